@@ -0,0 +1,193 @@
+"""JWT-аутентификация без запроса к таблице пользователей.
+
+Токены из token_for_user() несут подписанные роль, признак
+суперпользователя и версию токенов пользователя (TOKEN_CLAIMS).
+Права проверяются по claims, а с текущим состоянием пользователя
+сверяется только версия: смена роли или признака суперпользователя
+увеличивает её (User.save()), а деактивация и удаление отзывают все
+токены. Версия хранится в общем кэше под поколением `user:<id>`
+и в памяти процесса в LRU-кэше с ограниченным временем жизни;
+сохранение или удаление пользователя в любом воркере меняет
+поколение, и версия перечитывается из БД.
+
+Токены без claims, выданные до их появления, проверяются по полям
+пользователя (USER_CACHE_FIELDS) из того же LRU-кэша. Их не отзывает
+смена версии, только деактивация: они действуют до истечения
+ACCESS_TOKEN_LIFETIME, но роль берут из БД.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .cache import bump_generation, get_generation
+from api_yamdb.settings import AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL
+
+USER_CACHE_FIELDS = ('id', 'username', 'role', 'is_active', 'is_superuser',
+                     'token_version')
+# Поле пользователя -> claim токена доступа.
+TOKEN_CLAIMS = {
+    'role': 'role',
+    'is_superuser': 'su',
+    'token_version': 'tv',
+}
+TOKEN_VERSION_KEY = 'auth:tv:{}:{}'
+# Версия неактивного или удалённого пользователя: не совпадает
+# ни с одним токеном.
+REVOKED = -1
+
+
+def user_resource(user_id):
+    return f'user:{user_id}'
+
+
+class UserStateCache:
+    """LRU-кэш полей пользователей с ограниченным временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, user_id, version):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, entry_version, values = entry
+            if entry_version != version or expires < time.monotonic():
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, version, values):
+        with self.lock:
+            self.entries[user_id] = (time.monotonic() + self.ttl, version,
+                                     values)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserStateCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL)
+token_versions = UserStateCache(AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_TTL)
+
+
+def token_for_user(user):
+    """Токен доступа с ролью и версией токенов пользователя."""
+    refresh = RefreshToken.for_user(user)
+    for field, claim in TOKEN_CLAIMS.items():
+        refresh[claim] = getattr(user, field)
+    return refresh.access_token
+
+
+def invalidate_user(user_id):
+    """Сбрасывает закэшированные поля пользователя во всех воркерах."""
+    user_cache.discard(user_id)
+    token_versions.discard(user_id)
+    bump_generation(user_resource(user_id))
+
+
+def get_token_version(user_model, user_id, generation):
+    """Текущая версия токенов пользователя или REVOKED.
+
+    Читается из общего кэша, а при промахе — из БД, и кладётся туда
+    для остальных воркеров.
+    """
+    key = TOKEN_VERSION_KEY.format(user_id, generation)
+    version = cache.get(key)
+    if version is None:
+        row = user_model.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).values_list('token_version', 'is_active').first()
+        version = row[0] if row is not None and row[1] else REVOKED
+        cache.set(key, version,
+                  api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    return version
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая берёт пользователя из токена
+    и user_cache.
+
+    Возвращает экземпляр модели, у которого загружены только
+    поля из claims (или USER_CACHE_FIELDS для токенов без них);
+    остальные поля догружаются при обращении. Токен с устаревшей
+    версией отклоняется.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        generation = get_generation(user_resource(user_id))
+        if all(claim in validated_token for claim in TOKEN_CLAIMS.values()):
+            state = self.get_state_from_claims(validated_token, user_id,
+                                               generation)
+        else:
+            state = self.get_state_from_db(user_id, generation)
+        if not state['is_active']:
+            raise AuthenticationFailed(_('User is inactive'),
+                                       code='user_inactive')
+
+        # Новый экземпляр на каждый запрос: представления могут
+        # менять пользователя, кэш от этого не должен зависеть.
+        # from_db() ждёт значения в порядке полей модели.
+        field_names = [field.attname
+                       for field in self.user_model._meta.concrete_fields
+                       if field.attname in state]
+        return self.user_model.from_db(
+            self.user_model.objects.db, field_names,
+            [state[field] for field in field_names]
+        )
+
+    def get_state_from_claims(self, validated_token, user_id, generation):
+        version = token_versions.get(user_id, generation)
+        if version is None:
+            version = get_token_version(self.user_model, user_id,
+                                        generation)
+            token_versions.set(user_id, generation, version)
+        if version != validated_token[TOKEN_CLAIMS['token_version']]:
+            # Роль сменили после выдачи токена, или пользователь
+            # деактивирован либо удалён.
+            raise AuthenticationFailed(_('Token has been revoked'),
+                                       code='token_revoked')
+        state = {field: validated_token[claim]
+                 for field, claim in TOKEN_CLAIMS.items()}
+        state.update(id=user_id, is_active=True)
+        return state
+
+    def get_state_from_db(self, user_id, generation):
+        field_names = [field.attname
+                       for field in self.user_model._meta.concrete_fields
+                       if field.attname in USER_CACHE_FIELDS]
+        values = user_cache.get(user_id, generation)
+        if values is None:
+            values = self.user_model.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values_list(*field_names).first()
+            if values is None:
+                raise AuthenticationFailed(_('User not found'),
+                                           code='user_not_found')
+            user_cache.set(user_id, generation, values)
+        return dict(zip(field_names, values))
@@ -0,0 +1,171 @@
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .cache import bump_generation
+from .serializers import TitleBulkItemSerializer
+from reviews.models import Categories, Genres, Title
+from reviews.search import index_titles
+
+BULK_BATCH_SIZE = 500
+TITLE_UPDATE_FIELDS = ('name', 'year', 'description', 'category',
+                       'updated_at')
+
+
+def collect_slugs(items):
+    categories, genres = set(), set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        category = item.get('category')
+        if isinstance(category, (str, int)):
+            categories.add(str(category))
+        genre = item.get('genre')
+        if isinstance(genre, (list, tuple)):
+            genres.update(str(slug) for slug in genre
+                          if isinstance(slug, (str, int)))
+    return categories, genres
+
+
+def preload(items):
+    """Все категории, жанры и обновляемые произведения пакета:
+    по одному запросу на каждую таблицу."""
+    categories, genres = collect_slugs(items)
+    ids = {item['id'] for item in items
+           if isinstance(item, dict) and isinstance(item.get('id'), int)}
+    return {
+        Categories: Categories.objects.in_bulk(categories,
+                                               field_name='slug'),
+        Genres: Genres.objects.in_bulk(genres, field_name='slug'),
+        Title: Title.objects.visible().in_bulk(ids),
+    }
+
+
+def validate_titles(items):
+    """Проверяет элементы пакета. Возвращает пары (индекс, сериализатор)
+    для корректных элементов и словарь ошибок по индексам."""
+    preloaded = preload(items)
+    context = {'preloaded': preloaded}
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'non_field_errors': ['Ожидался объект.']}
+            continue
+        instance = None
+        if item.get('id') is not None:
+            instance = preloaded[Title].get(item['id'])
+            if instance is None:
+                errors[index] = {'id': ['Произведение не найдено.']}
+                continue
+        serializer = TitleBulkItemSerializer(
+            instance, data=item, partial=instance is not None,
+            context=context
+        )
+        if serializer.is_valid():
+            valid.append((index, serializer))
+        else:
+            errors[index] = serializer.errors
+    return valid, errors
+
+
+def bulk_results(items, errors, saved):
+    """Результат по каждому элементу пакета в порядке запроса."""
+    results = []
+    for index, item in enumerate(items):
+        if index in errors:
+            results.append({'index': index, 'status': 'error',
+                            'errors': errors[index]})
+        elif index in saved:
+            results.append({
+                'index': index, 'id': saved[index].pk,
+                'status': 'updated' if item.get('id') is not None
+                else 'created'
+            })
+        else:
+            results.append({'index': index, 'status': 'skipped'})
+    return results
+
+
+def allocate_ids(model, count, using):
+    """Первичные ключи для новых строк на СУБД без RETURNING в bulk_create.
+
+    Вызывается внутри транзакции. На SQLite ключи резервируются
+    в sqlite_sequence, как при обычной вставке в таблицу
+    с AUTOINCREMENT: UPDATE берёт блокировку записи до конца
+    транзакции, поэтому параллельные вставки ждут её и не получают
+    те же ключи, а ключи удалённых строк не выдаются повторно.
+    На других СУБД блокируется строка с наибольшим ключом.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s',
+                [count, table]
+            )
+            if not cursor.rowcount:
+                # В таблицу ещё ничего не вставляли.
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) '
+                    'VALUES (%s, %s)', [table, count]
+                )
+            cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s',
+                           [table])
+            last_id = cursor.fetchone()[0]
+        return range(last_id - count + 1, last_id + 1)
+    last_id = model.objects.using(using).select_for_update().order_by(
+        '-pk'
+    ).values_list('pk', flat=True).first() or 0
+    return range(last_id + 1, last_id + count + 1)
+
+
+def save_titles(valid, using='default'):
+    """Пишет проверенные элементы пакетными INSERT/UPDATE в одной
+    транзакции и возвращает сохранённые произведения по индексам."""
+    now = timezone.now()
+    created, updated, genres = [], [], {}
+    for index, serializer in valid:
+        data = dict(serializer.validated_data)
+        data.pop('id', None)
+        genre = data.pop('genre', None)
+        title = serializer.instance
+        if title is None:
+            title = Title(**data)
+            created.append((index, title))
+        else:
+            for field, value in data.items():
+                setattr(title, field, value)
+            title.updated_at = now
+            updated.append((index, title))
+        if genre is not None:
+            genres[index] = genre
+
+    links = Title.genre.through
+    with transaction.atomic(using=using):
+        new_titles = [title for _, title in created]
+        if (new_titles and not
+                connections[using].features.can_return_rows_from_bulk_insert):
+            for title, pk in zip(new_titles,
+                                 allocate_ids(Title, len(new_titles), using)):
+                title.pk = pk
+        Title.objects.using(using).bulk_create(new_titles,
+                                               batch_size=BULK_BATCH_SIZE)
+        Title.objects.using(using).bulk_update(
+            [title for _, title in updated], TITLE_UPDATE_FIELDS,
+            batch_size=BULK_BATCH_SIZE
+        )
+        saved = dict(created + updated)
+        replaced = [saved[index].pk for index, _ in updated
+                    if index in genres]
+        if replaced:
+            links.objects.using(using).filter(title_id__in=replaced).delete()
+        links.objects.using(using).bulk_create(
+            [links(title_id=saved[index].pk, genres_id=genre.pk)
+             for index, genre_list in genres.items()
+             for genre in genre_list],
+            batch_size=BULK_BATCH_SIZE, ignore_conflicts=True
+        )
+        index_titles(new_titles, using, created=True)
+        index_titles([title for _, title in updated], using)
+        transaction.on_commit(lambda: bump_generation('title'), using=using)
+    return saved
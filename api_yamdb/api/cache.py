@@ -0,0 +1,105 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from api_yamdb.settings import (RESPONSE_CACHE_LOCK_TIMEOUT,
+                                RESPONSE_CACHE_TIMEOUT, RESPONSE_CACHE_WAIT)
+
+GENERATION_KEY = 'generation:{}'
+LOCK_POLL_INTERVAL = 0.05
+
+
+def get_generation(resource):
+    """Текущее поколение данных ресурса.
+
+    Поколение входит в ключи кэша, поэтому запись в таблицы ресурса
+    делает все ранее закэшированные значения недоступными.
+    """
+    key = GENERATION_KEY.format(resource)
+    generation = cache.get(key)
+    if generation is None:
+        # Отметка времени вместо единицы: после вытеснения ключа
+        # старые записи кэша не совпадут с новым поколением.
+        generation = time.time_ns()
+        if not cache.add(key, generation, None):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def bump_generation(*resources):
+    for resource in resources:
+        key = GENERATION_KEY.format(resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def normalize_query(query_params, exclude=()):
+    """Хэш параметров запроса, не зависящий от их порядка."""
+    items = sorted(
+        (key, tuple(sorted(query_params.getlist(key))))
+        for key in query_params
+        if key not in exclude
+    )
+    return hashlib.md5(repr(items).encode()).hexdigest()
+
+
+def get_view_cache_key(kind, view, request, exclude=()):
+    """Ключ кэша для ответа представления с учётом поколений ресурсов."""
+    generations = ':'.join(
+        str(get_generation(resource)) for resource in view.cache_resources
+    )
+    return '{}:{}:{}:{}{}:{}'.format(
+        kind, view.basename, generations, request.get_host(), request.path,
+        normalize_query(request.query_params, exclude)
+    )
+
+
+def get_or_compute(key, compute, timeout=RESPONSE_CACHE_TIMEOUT,
+                   lock_timeout=RESPONSE_CACHE_LOCK_TIMEOUT,
+                   wait=RESPONSE_CACHE_WAIT):
+    """Значение из кэша или результат compute() с защитой от лавины.
+
+    При промахе значение вычисляет только тот, кто захватил блокировку,
+    остальные ждут его результата не дольше `wait` секунд.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return compute()
+
+
+class CachedListMixin:
+    """Кэширует данные ответа `list`.
+
+    Ключ состоит из пути, нормализованной строки запроса и поколений
+    ресурсов из `cache_resources`, поэтому запись в любую из таблиц
+    ресурса делает закэшированные страницы недоступными.
+    """
+    cache_resources = ()
+
+    def list(self, request, *args, **kwargs):
+        data = get_or_compute(
+            get_view_cache_key('response', self, request),
+            lambda: super(CachedListMixin, self).list(
+                request, *args, **kwargs
+            ).data
+        )
+        return Response(data)
@@ -1,17 +1,132 @@
+import string
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Upper
 from django_filters import rest_framework as df_filters
 
 from reviews.models import Title
+from reviews.search import search_titles
+from users.models import User
+
+GENRE_MODES = (
+    ('any', 'Хотя бы один из жанров'),
+    ('all', 'Все жанры'),
+)
+
+
+def parse_slugs(value):
+    """Список слагов из `drama,comedy`; `dra*` означает префикс."""
+    return [slug.strip() for slug in value.split(',') if slug.strip()]
+
+
+def slug_condition(field, slug):
+    """Условие на слаг, которое обслуживается обычным индексом.
+
+    Префикс превращается в диапазон `>= prefix AND < prefix+1`,
+    а не в LIKE, который в SQLite не использует индекс.
+    """
+    if not slug.endswith('*'):
+        return Q(**{field: slug})
+    return prefix_condition(field, slug.rstrip('*'))
+
+
+def prefix_condition(field, prefix):
+    """Строки, начинающиеся с `prefix`, как диапазон по индексу."""
+    if not prefix:
+        return Q()
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': upper})
 
 
 class TitleFilter(df_filters.FilterSet):
     """Фильтр по полям произведений."""
-    category = df_filters.CharFilter(field_name='category__slug',
-                                     lookup_expr='icontains')
-    genre = df_filters.CharFilter(field_name='genre__slug',
-                                  lookup_expr='icontains')
+    category = df_filters.CharFilter(method='filter_category')
+    genre = df_filters.CharFilter(method='filter_genre')
+    genre_mode = df_filters.ChoiceFilter(choices=GENRE_MODES,
+                                         method='filter_genre_mode')
     name = df_filters.CharFilter(field_name='name', lookup_expr='icontains')
     year = df_filters.NumberFilter
+    search = df_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'genre_mode', 'name', 'year',
+                  'search')
+
+    def filter_category(self, queryset, name, value):
+        slugs = parse_slugs(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(reduce(
+            or_, (slug_condition('category__slug', slug) for slug in slugs)
+        ))
+
+    def filter_genre(self, queryset, name, value):
+        """Жанры через полусоединение с таблицей связей: без дублей.
+
+        В режиме `any` — один подзапрос на все слаги,
+        в режиме `all` — по подзапросу на каждый слаг.
+        """
+        slugs = parse_slugs(value)
+        if not slugs:
+            return queryset
+        links = Title.genre.through.objects
+        if self.form.cleaned_data.get('genre_mode') == 'all':
+            for slug in slugs:
+                queryset = queryset.filter(pk__in=links.filter(
+                    slug_condition('genres__slug', slug)
+                ).values('title_id'))
+            return queryset
+        return queryset.filter(pk__in=links.filter(reduce(
+            or_, (slug_condition('genres__slug', slug) for slug in slugs)
+        )).values('title_id'))
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим учитывается в filter_genre.
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return search_titles(queryset, value)
+
+
+ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+
+
+def db_upper(value, using):
+    """Верхний регистр значения так, как его вычисляет UPPER() в СУБД.
+
+    UPPER() в SQLite меняет регистр только латинских букв, поэтому
+    str.upper() для кириллицы дал бы строку, которой нет в индексе.
+    """
+    if connections[using].vendor == 'sqlite':
+        return value.translate(ASCII_UPPER)
+    return value.upper()
+
+
+class UserFilter(df_filters.FilterSet):
+    """Фильтр пользователей для администратора.
+
+    `search` — префикс username или email без учёта регистра:
+    сравнивается UPPER(поле), как в функциональных индексах модели.
+    На SQLite регистр не учитывается только для латиницы: `ив`
+    находит `иван`, но не `Иван`.
+    """
+    search = df_filters.CharFilter(method='filter_search')
+    role = df_filters.ChoiceFilter(choices=User.roles)
+
+    class Meta:
+        model = User
+        fields = ('search', 'role')
+
+    def filter_search(self, queryset, name, value):
+        prefix = db_upper(value.strip(), queryset.db)
+        if not prefix:
+            return queryset
+        return queryset.alias(
+            username_upper=Upper('username'), email_upper=Upper('email')
+        ).filter(prefix_condition('username_upper', prefix)
+                 | prefix_condition('email_upper', prefix))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation
+from api_yamdb.settings import PURGE_BATCH_SIZE
+from reviews.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    """Фоновое удаление произведений и пользователей, скрытых из API
+    при удалении (запускается по расписанию):
+     python manage.py purge_deleted """
+
+    help = ('Удаляет помеченные произведения и пользователей вместе '
+            'с отзывами и комментариями пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=PURGE_BATCH_SIZE,
+            help='Сколько отзывов удалять в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_deleted(options['batch_size'])
+        if purged:
+            bump_generation('title', 'rating')
+        self.stdout.write(f'Удалено объектов: {purged}')
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import bump_generation
+from reviews.ratings import (check_title_ratings, rebuild_title_ratings,
+                             refresh_title_averages)
+
+
+class Command(BaseCommand):
+    """Пересчёт сохранённого рейтинга произведений:
+     python manage.py rebuild_ratings
+    Проверка без записи:
+     python manage.py rebuild_ratings --check
+    Только средний и взвешенный рейтинг, без обращения к отзывам (для cron):
+     python manage.py rebuild_ratings --ranks """
+
+    help = ('Пересчитывает рейтинг, число отзывов, сумму оценок '
+            'и гистограмму оценок произведений')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только сверить сохранённые значения с отзывами'
+        )
+        parser.add_argument(
+            '--ranks', action='store_true',
+            help='Только пересчитать средний и взвешенный рейтинг '
+                 'по сохранённым сумме и числу оценок'
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = check_title_ratings()
+            for title_id, field, stored, actual in mismatches:
+                self.stdout.write(f'Произведение {title_id}: {field} = '
+                                  f'{stored}, по отзывам {actual}')
+            if mismatches:
+                raise CommandError(f'Расхождений: {len(mismatches)}')
+            self.stdout.write('Расхождений нет')
+            return
+        if options['ranks']:
+            updated = refresh_title_averages()
+        else:
+            updated = rebuild_title_ratings()
+        bump_generation('rating')
+        self.stdout.write(f'Обновлено произведений: {updated}')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_generation
+from reviews.search import fts_enabled, rebuild_title_index
+
+
+class Command(BaseCommand):
+    """Пересборка полнотекстового индекса произведений:
+     python manage.py rebuild_search_index """
+
+    help = 'Пересобирает полнотекстовый индекс названий и описаний'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write('Полнотекстовый индекс недоступен для этой БД')
+            return
+        indexed = rebuild_title_index()
+        bump_generation('title')
+        self.stdout.write(f'Проиндексировано произведений: {indexed}')
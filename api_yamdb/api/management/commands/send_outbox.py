@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import delete_sent, outbox_stats, send_outbox
+
+
+class Command(BaseCommand):
+    """Отправка писем из очереди (запускается по расписанию или в цикле):
+     python manage.py send_outbox
+    Только метрики очереди, без отправки:
+     python manage.py send_outbox --stats """
+
+    help = ('Отправляет письма из очереди пачками через одно '
+            'SMTP-соединение на пачку')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help='Сколько писем отправлять через одно соединение'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Только вывести глубину очереди и задержку доставки'
+        )
+
+    def handle(self, *args, **options):
+        if not options['stats']:
+            result = send_outbox(options['batch_size'])
+            delete_sent(settings.EMAIL_OUTBOX_RETENTION)
+            self.stdout.write(
+                f'Отправлено: {result["sent"]}, заменено: '
+                f'{result["coalesced"]}, с ошибкой: {result["failed"]}'
+            )
+        for name, value in outbox_stats().items():
+            self.stdout.write(f'{name}: {value}')
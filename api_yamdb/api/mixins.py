@@ -0,0 +1,205 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .cache import (get_generation, get_or_compute, get_view_cache_key,
+                    normalize_query)
+from .serializers import requested_fields
+from reviews.models import Title
+
+
+class ConditionalListMixin:
+    """ETag для `list`.
+
+    Валидатор считается одним агрегатом по `updated_at` до сериализации:
+    если клиент прислал актуальный If-None-Match, ответ 304 отдаётся
+    без загрузки объектов. Last-Modified не отдаётся: MAX(updated_at)
+    не меняется ни при удалении строк, ни при изменении вложенных
+    объектов, и If-Modified-Since отдавал бы 304 для устаревшего
+    ответа. Вложенные объекты учитываются в ETag через поколения
+    `cache_resources` и `etag_resources`. У представлений
+    с `cache_resources` результат агрегата тоже берётся из кэша.
+
+    Если пагинация не считает объекты (`?cursor=`, `?count=none`),
+    проба тоже обходится без COUNT, и удаление строк замечается только
+    через поколения `cache_resources`. Представлениям без поколений
+    нужен `page_validators`: в этих режимах ETag считается по уже
+    выбранной странице — её ключам, MAX(updated_at) и ссылкам, — а не
+    агрегатом по всем строкам родителя.
+    """
+    modified_field = 'updated_at'
+    page_validators = False
+    # Поколения вложенных в ответ объектов, которые входят только
+    # в ETag, но не в ключи кэша.
+    etag_resources = ()
+
+    def probe_counts_objects(self, request):
+        paginator = self.paginator
+        if paginator is None or not hasattr(paginator, 'counts_objects'):
+            return True
+        return paginator.counts_objects(request)
+
+    def get_list_probe(self, request):
+        counts_objects = self.probe_counts_objects(request)
+
+        def probe():
+            aggregates = {'last_modified': Max(self.modified_field)}
+            if counts_objects:
+                aggregates['count'] = Count('pk')
+            probe = self.filter_queryset(
+                self.get_queryset()
+            ).order_by().aggregate(**aggregates)
+            probe.setdefault('count', None)
+            return probe
+
+        if getattr(self, 'cache_resources', ()):
+            exclude = ()
+            if self.paginator is not None:
+                exclude = (getattr(self.paginator, 'page_query_param', ''),)
+            return get_or_compute(
+                get_view_cache_key('probe', self, request, exclude), probe
+            )
+        return probe()
+
+    def get_etag_resources(self, request):
+        return self.etag_resources
+
+    def get_etag(self, request, probe):
+        # Поколения учитывают изменения связанных объектов, например
+        # переименование жанра, которые не трогают `updated_at` строк.
+        resources = (*getattr(self, 'cache_resources', ()),
+                     *self.get_etag_resources(request))
+        generations = [get_generation(resource) for resource in resources]
+        last_modified = probe['last_modified']
+        fingerprint = '{}:{}:{}:{}:{}:{}:{}'.format(
+            request.path, probe['count'], probe.get('page'),
+            last_modified.isoformat() if last_modified else '',
+            generations, request.accepted_renderer.format,
+            normalize_query(request.query_params)
+        )
+        return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+    def conditional_response(self, request, probe, build_response):
+        if probe is None:
+            return build_response()
+        etag = self.get_etag(request, probe)
+        response = get_conditional_response(request, etag)
+        if response is None:
+            response = build_response()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
+
+    def get_page_probe(self, request, objects):
+        """Проба по выбранной странице: без запросов к БД."""
+        return {
+            'count': None,
+            'last_modified': max(
+                (getattr(obj, self.modified_field) for obj in objects),
+                default=None
+            ),
+            'page': ([obj.pk for obj in objects],
+                     self.paginator.get_page_state()),
+        }
+
+    def list_by_page(self, request):
+        page = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        return self.conditional_response(
+            request, self.get_page_probe(request, page),
+            lambda: self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        )
+
+    def list(self, request, *args, **kwargs):
+        if (self.page_validators and self.paginator is not None
+                and not self.probe_counts_objects(request)):
+            return self.list_by_page(request)
+        # Пагинация берёт число объектов из пробы, а не считает его снова.
+        self.list_probe = self.get_list_probe(request)
+        return self.conditional_response(
+            request, self.list_probe,
+            lambda: super(ConditionalListMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """ETag для `list` и `retrieve`."""
+
+    def get_detail_probe(self, request):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        last_modified = (
+            self.filter_queryset(self.get_queryset())
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .order_by().values_list(self.modified_field, flat=True).first()
+        )
+        if last_modified is None:
+            return None
+        return {'count': 1, 'last_modified': last_modified}
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.get_detail_probe(request),
+            lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+
+class SparseQuerysetMixin:
+    """Загружает из БД только то, что нужно запрошенным полям.
+
+    Для полей, убранных через `?fields=`/`?omit=`, не выполняются
+    `select_related`/`prefetch_related`, а их столбцы откладываются.
+    Поля сортировки и `updated_at` не откладываются никогда.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    protected_fields = ('id', 'updated_at')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        field_names = list(self.get_serializer_class()().fields)
+        kept = set(requested_fields(self.request, field_names))
+        select = [name for name in self.select_related_fields
+                  if name in kept]
+        prefetch = [name for name in self.prefetch_related_fields
+                    if name in kept]
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+
+        meta = queryset.model._meta
+        protected = set(self.protected_fields)
+        protected.update(
+            name.lstrip('-')
+            for name in (*queryset.query.order_by, *meta.ordering)
+        )
+        concrete = {field.name for field in meta.concrete_fields}
+        deferred = [name for name in field_names
+                    if name not in kept and name in concrete
+                    and name not in protected]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+        return queryset
+
+
+class TitleParentMixin:
+    """Доступ к произведению из `title_id` вложенного URL."""
+
+    def get_title(self):
+        """Произведение из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title.objects.visible().only('id', 'name'),
+                pk=self.kwargs.get('title_id')
+            )
+        return self._title
@@ -1,16 +1,398 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import datetime
+import json
+from functools import partial
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-from api_yamdb.settings import PAGINATOR_PAGE_ITEMS_COUNT
+from .cache import get_generation, normalize_query
+from api_yamdb.settings import (PAGINATOR_COUNT_CACHE_TIMEOUT,
+                                PAGINATOR_COUNT_ESTIMATE_LIMIT,
+                                PAGINATOR_PAGE_ITEMS_COUNT,
+                                USERS_MAX_PAGE_SIZE, USERS_PAGE_SIZE)
 
 
-class Pagination(PageNumberPagination):
+def estimate_table_rows(model):
+    """Число строк таблицы по статистике СУБД или None."""
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ('SELECT reltuples::bigint FROM pg_class '
+                       'WHERE relname = %s'),
+        'sqlite': ('SELECT CAST(stat AS INTEGER) FROM sqlite_stat1 '
+                   'WHERE tbl = %s LIMIT 1'),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(queries[connection.vendor], [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class CountingPaginator(DjangoPaginator):
+    """Paginator, которому число объектов подсказывает пагинация DRF."""
+
+    def __init__(self, object_list, per_page, count_getter=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_getter = count_getter
+
+    @cached_property
+    def count(self):
+        if self.count_getter is None:
+            return super().count
+        return self.count_getter(self.object_list)
+
+
+class KeysetPagination(BasePagination):
+    """Пагинация по ключу: следующая страница начинается после последней
+    строки предыдущей, без OFFSET и без COUNT(*).
+
+    `ordering` должен быть уникальным в совокупности, поэтому последним
+    полем обычно идёт `id`. Параметр `?ordering=-<первое поле>`
+    обходит тот же ключ в обратном порядке.
+    """
     page_size = PAGINATOR_PAGE_ITEMS_COUNT
+    # Размер страницы из запроса, если задан параметр: не больше
+    # max_page_size.
+    page_size_query_param = None
+    max_page_size = None
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering = ('id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def counts_objects(self, request):
+        return False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_requested_ordering(request)
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            position = self.clean_position(position, queryset)
+            try:
+                queryset = queryset.filter(
+                    self.get_keyset_filter(position, reverse)
+                )
+            except (TypeError, ValueError):
+                # Например, None: поля ключа не бывают пустыми.
+                raise NotFound(self.invalid_cursor_message)
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param is None:
+            return self.page_size
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        if self.max_page_size is not None:
+            return min(size, self.max_page_size)
+        return size
+
+    def get_requested_ordering(self, request):
+        reversed_ordering = self.get_ordering(reverse=True)
+        value = request.query_params.get(self.ordering_query_param)
+        if value == reversed_ordering[0]:
+            return reversed_ordering
+        return self.ordering
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+        return tuple(field[1:] if field.startswith('-') else f'-{field}'
+                     for field in self.ordering)
+
+    def get_keyset_filter(self, position, reverse=False):
+        """Условие «строго после позиции» для составного ключа.
+
+        Первое поле дополнительно ограничено нестрогим неравенством,
+        чтобы СУБД могла использовать индекс как диапазон.
+        """
+        condition = None
+        for field, value in reversed(tuple(zip(self.ordering, position))):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            if condition is None:
+                condition = after
+            else:
+                condition = after | (Q(**{name: value}) & condition)
+        field = self.ordering[0]
+        descending = field.startswith('-') != reverse
+        bound = Q(**{
+            f'{field.lstrip("-")}__{"lte" if descending else "gte"}':
+                position[0]
+        })
+        return bound & condition
+
+    def get_position(self, obj):
+        position = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if isinstance(value, (datetime.date, datetime.datetime)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+    def clean_position(self, position, queryset):
+        """Приводит значения курсора к типам полей ключа.
+
+        Курсор приходит от клиента: значение не того типа иначе
+        дошло бы до СУБД и завершилось ошибкой сервера.
+        """
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            annotation = queryset.query.annotations.get(name)
+            if annotation is not None:
+                model_field = annotation.output_field
+            else:
+                model_field = queryset.model._meta.get_field(name)
+            try:
+                value = model_field.to_python(value)
+                # Число больше столбца СУБД иначе падает уже при
+                # выполнении запроса. SQLite не сообщает пределов
+                # полей, поэтому граница 64 бит проверяется отдельно.
+                if value is not None:
+                    model_field.run_validators(value)
+                if isinstance(value, int) and not (
+                    -2 ** 63 <= value < 2 ** 63
+                ):
+                    raise ValueError(value)
+            except (TypeError, ValueError, OverflowError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return cleaned
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position, reverse = data['p'], bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, obj, reverse=False):
+        data = {'p': self.get_position(obj)}
+        if reverse:
+            data['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(data, separators=(',', ':')).encode()
+        ).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_page_state(self):
+        """Что, кроме строк страницы, определяет ответ: для ETag."""
+        return self.has_next, self.has_previous
 
     def get_paginated_response(self, data):
         return Response({
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
-            'count': self.page.paginator.count,
             'results': data
         })
+
+
+class TitleKeysetPagination(KeysetPagination):
+    ordering = ('name', 'id')
+
+
+class TitleRankKeysetPagination(KeysetPagination):
+    ordering = ('-rank_score', 'id')
+
+
+class PubDateKeysetPagination(KeysetPagination):
+    """Отзывы и комментарии в порядке публикации: новые строки
+    попадают в конец ключа и не сдвигают уже выданные страницы."""
+    ordering = ('pub_date', 'id')
+
+
+class Pagination(PageNumberPagination):
+    """Постраничная пагинация с кэшированным числом объектов.
+
+    Режим подсчёта выбирается параметром `?count=`:
+    `exact` — точное число из кэша, сбрасываемого при записи в таблицы;
+    `estimated` — дешёвая оценка; `none` — без подсчёта, только `has_more`.
+    """
+    page_size = PAGINATOR_PAGE_ITEMS_COUNT
+    count_query_param = 'count'
+    count_modes = ('exact', 'estimated', 'none')
+    count_cache_timeout = PAGINATOR_COUNT_CACHE_TIMEOUT
+    count_estimate_limit = PAGINATOR_COUNT_ESTIMATE_LIMIT
+    # Постраничный режим по ключу включается параметром `?cursor=`.
+    keyset_pagination_class = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        keyset_class = self.keyset_pagination_class
+        if (keyset_class is not None
+                and keyset_class.cursor_query_param in request.query_params):
+            self.keyset_paginator = keyset_class()
+            return self.keyset_paginator.paginate_queryset(queryset, request,
+                                                           view)
+        self.count_mode = request.query_params.get(self.count_query_param)
+        if self.count_mode not in self.count_modes:
+            self.count_mode = self.count_modes[0]
+        count_getter = getattr(self, f'get_{self.count_mode}_count')
+        self.django_paginator_class = partial(
+            CountingPaginator,
+            count_getter=partial(count_getter, request=request, view=view)
+        )
+        return super().paginate_queryset(queryset, request, view)
+
+    def counts_objects(self, request):
+        """Будет ли для запроса посчитано точное число объектов."""
+        keyset_class = self.keyset_pagination_class
+        if (keyset_class is not None
+                and keyset_class.cursor_query_param in request.query_params):
+            return False
+        mode = request.query_params.get(self.count_query_param)
+        return mode not in self.count_modes[1:]
+
+    def get_count_cache_key(self, queryset, request):
+        exclude = (self.page_query_param, self.count_query_param,
+                   self.page_size_query_param)
+        model = queryset.model._meta.model_name
+        return 'count:{}:{}:{}:{}'.format(
+            model, get_generation(model), request.path,
+            normalize_query(request.query_params, exclude)
+        )
+
+    def get_exact_count(self, queryset, request, view=None):
+        probe = getattr(view, 'list_probe', None)
+        if probe is not None and probe['count'] is not None:
+            return probe['count']
+        key = self.get_count_cache_key(queryset, request)
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    def get_estimated_count(self, queryset, request, view=None):
+        limit = self.count_estimate_limit
+        count = queryset.order_by()[:limit + 1].count()
+        if count <= limit:
+            return count
+        if self.is_unfiltered(queryset):
+            return estimate_table_rows(queryset.model) or count
+        return count
+
+    def is_unfiltered(self, queryset):
+        """Выбирает ли queryset всю таблицу: условие `visible()` модели
+        (без объектов, ожидающих фоновой очистки) не считается фильтром,
+        такие строки редки и оценку не портят."""
+        where = queryset.query.where
+        if not where:
+            return True
+        base = queryset.model._default_manager.all()
+        return hasattr(base, 'visible') and where == base.visible().query.where
+
+    def get_none_count(self, queryset, request, view=None):
+        # Число объектов до конца текущей страницы плюс одна строка:
+        # этого достаточно, чтобы понять, есть ли следующая страница.
+        try:
+            number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            number = 1
+        page_size = self.get_page_size(request)
+        offset = max(number - 1, 0) * page_size
+        return offset + queryset.order_by()[
+            offset:offset + page_size + 1
+        ].count()
+
+    def get_page_state(self):
+        """Что, кроме строк страницы, определяет ответ: для ETag."""
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_page_state()
+        count = None
+        if self.count_mode != 'none':
+            count = self.page.paginator.count
+        return self.page.number, self.page.has_next(), count
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'has_more': self.page.has_next(),
+            'results': data
+        }
+        if self.count_mode != 'none':
+            response['count'] = self.page.paginator.count
+        return Response(response)
+
+
+class TitlePagination(Pagination):
+    keyset_pagination_class = TitleKeysetPagination
+
+
+class PubDatePagination(Pagination):
+    keyset_pagination_class = PubDateKeysetPagination
+
+
+class UserKeysetPagination(KeysetPagination):
+    ordering = ('username',)
+    page_size = USERS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = USERS_MAX_PAGE_SIZE
+
+
+class UserPagination(Pagination):
+    page_size = USERS_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = USERS_MAX_PAGE_SIZE
+    keyset_pagination_class = UserKeysetPagination
@@ -1,6 +1,6 @@
-from django.shortcuts import get_object_or_404
-from rest_framework import serializers
-from rest_framework.exceptions import ValidationError
+from django.utils.encoding import smart_str
+from rest_framework import permissions, serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 
 from reviews.models import (Categories,
                             Comment,
@@ -9,6 +9,89 @@ from reviews.models import (Categories,
                             Title)
 
 
+def parse_field_list(value):
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+def requested_fields(request, field_names):
+    """Поля, оставшиеся после `?fields=` и `?omit=` в GET-запросе."""
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return list(field_names)
+    only = parse_field_list(request.query_params.get('fields'))
+    omit = parse_field_list(request.query_params.get('omit'))
+    return [name for name in field_names
+            if (not only or name in only) and name not in omit]
+
+
+class SparseFieldsMixin:
+    """Убирает из представления поля, не запрошенные клиентом."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        kept = requested_fields(self.context.get('request'), self.fields)
+        for name in set(self.fields) - set(kept):
+            self.fields.pop(name)
+
+
+def requested_expansions(request):
+    """Связи, которые клиент просит вложить через `?expand=`."""
+    if request is None or request.method not in permissions.SAFE_METHODS:
+        return set()
+    return parse_field_list(request.query_params.get('expand'))
+
+
+class ExpandFieldsMixin:
+    """Заменяет ссылку по id вложенным объектом из `?expand=`.
+
+    Поля из `expand_only_fields` выводятся, только если названы
+    в `?expand=`.
+    """
+    expandable_fields = {}
+    expand_only_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = requested_expansions(self.context.get('request'))
+        for name in expand & set(self.expandable_fields) & set(self.fields):
+            self.fields[name] = self.expandable_fields[name](read_only=True)
+        for name in set(self.expand_only_fields) - expand:
+            self.fields.pop(name, None)
+
+
+class SlugManyRelatedField(serializers.ManyRelatedField):
+    """Список слагов, который разрешается в объекты одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        slugs = [str(slug) for slug in data]
+        found = {
+            getattr(obj, child.slug_field): obj
+            for obj in child.get_queryset().filter(
+                **{f'{child.slug_field}__in': slugs}
+            )
+        }
+        for slug in slugs:
+            if slug not in found:
+                child.fail('does_not_exist',
+                           slug_name=child.slug_field, value=slug)
+        return [found[slug] for slug in slugs]
+
+
+class SlugListRelatedField(serializers.SlugRelatedField):
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugManyRelatedField(**list_kwargs)
+
+
 class GenresSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -23,7 +106,21 @@ class CategoriesSerializer(serializers.ModelSerializer):
         model = Categories
 
 
-class TitlesSerializer(serializers.ModelSerializer):
+class ReviewSummarySerializer(serializers.ModelSerializer):
+    """Краткий отзыв для вложения в комментарии и произведения."""
+
+    author = serializers.SlugRelatedField(
+        read_only=True,
+        slug_field='username'
+    )
+
+    class Meta:
+        model = Review
+        fields = ('id', 'text', 'author', 'score', 'pub_date')
+
+
+class TitlesSerializer(ExpandFieldsMixin, SparseFieldsMixin,
+                       serializers.ModelSerializer):
     category = CategoriesSerializer(
         read_only=True
     )
@@ -32,11 +129,20 @@ class TitlesSerializer(serializers.ModelSerializer):
         read_only=True
     )
     rating = serializers.IntegerField(read_only=True)
+    rating_histogram = serializers.DictField(
+        source='score_histogram',
+        child=serializers.IntegerField(),
+        read_only=True
+    )
+    # Заполняется представлением: reviews.feeds.attach_latest_reviews.
+    latest_reviews = ReviewSummarySerializer(many=True, read_only=True)
+    expand_only_fields = ('rating_histogram', 'latest_reviews')
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'description',
-                  'genre', 'category', 'rating')
+                  'genre', 'category', 'rating', 'rating_histogram',
+                  'latest_reviews')
         read_only_fields = ('id',)
 
 
@@ -45,7 +151,7 @@ class TitlesCreateSerializer(serializers.ModelSerializer):
         slug_field='slug',
         queryset=Categories.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = SlugListRelatedField(
         slug_field='slug',
         queryset=Genres.objects.all(),
         many=True
@@ -58,22 +164,50 @@ class TitlesCreateSerializer(serializers.ModelSerializer):
         model = Title
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class PreloadedSlugRelatedField(serializers.SlugRelatedField):
+    """Слаг, который ищется в заранее загруженном словаре `context`.
+
+    Нужен для пакетной загрузки: все слаги пакета разрешаются одним
+    запросом до валидации, а не по запросу на каждый элемент.
+    """
+
+    def to_internal_value(self, data):
+        objects = self.context['preloaded'][self.get_queryset().model]
+        try:
+            return objects[str(data)]
+        except (KeyError, TypeError):
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+
+
+class TitleBulkItemSerializer(TitlesCreateSerializer):
+    id = serializers.IntegerField(required=False)
+    category = PreloadedSlugRelatedField(
+        slug_field='slug',
+        queryset=Categories.objects.all()
+    )
+    genre = PreloadedSlugRelatedField(
+        slug_field='slug',
+        queryset=Genres.objects.all(),
+        many=True
+    )
+
+
+class CommentSerializer(ExpandFieldsMixin, SparseFieldsMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username'
     )
-    review = serializers.SlugRelatedField(
-        read_only=True,
-        slug_field='text'
-    )
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+    expandable_fields = {'review': ReviewSummarySerializer}
 
     class Meta:
         model = Comment
         fields = '__all__'
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True,
         slug_field='username',
@@ -84,17 +218,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         slug_field='name'
     )
 
-    def validate(self, data):
-        request = self.context['request']
-        author = request.user
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        if request.method == 'POST':
-            if Review.objects.filter(title=title, author=author).exists():
-                raise ValidationError('Вы не можете добавить'
-                                      ' ещё один отзыв на произведение')
-        return data
-
     class Meta:
         model = Review
         fields = '__all__'
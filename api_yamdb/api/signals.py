@@ -0,0 +1,44 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .authentication import invalidate_user
+from .cache import bump_generation
+from reviews.models import Categories, Genres, Review, Title
+from users.models import User
+
+# Какие закэшированные ресурсы устаревают при записи в модель.
+# Получатели подключаются только к этим моделям: обработчик post_delete
+# без sender запретил бы Django быстрое каскадное удаление.
+INVALIDATES = {
+    Title: ('title',),
+    Genres: ('genres', 'title'),
+    Categories: ('categories', 'title'),
+    # Отзывы меняют рейтинг в списке произведений, но не число строк.
+    Review: ('rating',),
+}
+
+
+def invalidate_on_write(sender, **kwargs):
+    bump_generation(*INVALIDATES[sender])
+
+
+def invalidate_user_on_write(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+    # Число пользователей в списке /users/.
+    bump_generation('user')
+
+
+def invalidate_on_genre_link(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_generation(*INVALIDATES[Title])
+
+
+for model in INVALIDATES:
+    post_save.connect(invalidate_on_write, sender=model,
+                      dispatch_uid=f'invalidate_{model._meta.label_lower}')
+    post_delete.connect(invalidate_on_write, sender=model,
+                        dispatch_uid=f'invalidate_{model._meta.label_lower}')
+m2m_changed.connect(invalidate_on_genre_link, sender=Title.genre.through)
+post_save.connect(invalidate_user_on_write, sender=User,
+                  dispatch_uid='invalidate_auth_user')
+post_delete.connect(invalidate_user_on_write, sender=User,
+                    dispatch_uid='invalidate_auth_user')
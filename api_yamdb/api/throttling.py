@@ -0,0 +1,133 @@
+"""Ограничение частоты запросов к открытым эндпоинтам аутентификации.
+
+Счётчик скользящего окна: на каждое окно длиной `duration` в общем
+кэше хранится один счётчик. Число запросов за последние `duration`
+секунд оценивается как счётчик текущего окна плюс доля счётчика
+предыдущего, пропорциональная ещё не истёкшей его части. Это два
+ключа кэша на идентификатор вместо списка отметок времени
+в SimpleRateThrottle.
+
+Запрос сначала занимает место атомарным incr() и решает по
+возвращённому значению, поэтому параллельные запросы не превысят
+лимит; отклонённый запрос освобождает место через decr().
+
+Частоты задаются в REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] под
+ключами `<throttle_scope представления>_ip` и `..._identifier`.
+"""
+import hashlib
+import math
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    # Ключ короткий: бэкенды кэша проверяют каждый символ ключа
+    # при каждом обращении.
+    cache_format = 'thr:%(scope)s:%(ident)s:%(window)d'
+    scope_suffix = None
+
+    def __init__(self):
+        # Частота зависит от представления и определяется
+        # в allow_request(), как в ScopedRateThrottle.
+        pass
+
+    def get_idents(self, request, view):
+        """Идентификаторы, по каждому из которых ведётся свой счётчик;
+        по умолчанию IP-адрес клиента (с учётом NUM_PROXIES)."""
+        return [self.get_ident(request)]
+
+    def get_window_key(self, ident, window):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': hashlib.md5(ident.encode()).hexdigest()[:16],
+            'window': window,
+        }
+
+    def allow_request(self, request, view):
+        view_scope = getattr(view, 'throttle_scope', None)
+        if not view_scope:
+            return True
+        self.scope = f'{view_scope}_{self.scope_suffix}'
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        if self.rate is None:
+            return True
+
+        idents = self.get_idents(request, view)
+        if not idents:
+            return True
+        window, elapsed = divmod(self.timer(), self.duration)
+        window = int(window)
+        keys = [(self.get_window_key(ident, window - 1),
+                 self.get_window_key(ident, window)) for ident in idents]
+        # Счётчики текущего окна — уже с этим запросом.
+        currents = [self.increment(current_key) for _, current_key in keys]
+        counts = self.cache.get_many([previous_key
+                                      for previous_key, _ in keys])
+        self.wait_time = 0
+        for (previous_key, _), current in zip(keys, currents):
+            self.wait_time = max(self.wait_time, self.get_wait(
+                counts.get(previous_key, 0), current - 1, elapsed
+            ))
+        if not self.wait_time:
+            return True
+        for _, current_key in keys:
+            try:
+                self.cache.decr(current_key)
+            except ValueError:
+                # Ключ уже истёк: освобождать нечего.
+                pass
+        return False
+
+    def increment(self, key):
+        """Атомарно увеличивает счётчик окна и возвращает новое значение."""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Первый запрос в окне. Ключ живёт два окна: следующее
+            # окно читает его как предыдущее.
+            if self.cache.add(key, 1, self.duration * 2):
+                return 1
+            return self.cache.incr(key)
+
+    def get_wait(self, previous, current, elapsed):
+        """Через сколько секунд запрос будет разрешён; 0 — сейчас."""
+        limit = self.num_requests - 1
+        remaining = self.duration - elapsed
+        if current > limit:
+            # В текущем окне лимит исчерпан: ждём следующего, где этот
+            # счётчик станет предыдущим и его вес начнёт убывать.
+            if not current:
+                return math.ceil(remaining)
+            return math.ceil(remaining + max(
+                0, self.duration * (1 - limit / current)
+            ))
+        if previous * (1 - elapsed / self.duration) + current <= limit:
+            return 0
+        # previous > 0, иначе условие выше выполнилось бы.
+        wait = self.duration * (1 - (limit - current) / previous) - elapsed
+        return max(1, math.ceil(wait))
+
+    def wait(self):
+        return self.wait_time
+
+
+class AuthIPThrottle(SlidingWindowThrottle):
+    """Лимит по IP-адресу клиента (с учётом NUM_PROXIES)."""
+    scope_suffix = 'ip'
+
+
+class AuthIdentifierThrottle(SlidingWindowThrottle):
+    """Лимит по username и email из тела запроса: ограничивает
+    перебор кодов и повторную отправку писем на один адрес
+    независимо от числа IP-адресов клиента."""
+    scope_suffix = 'identifier'
+
+    def get_idents(self, request, view):
+        idents = []
+        data = request.data if isinstance(request.data, dict) else {}
+        for field in getattr(view, 'throttle_identifier_fields', ()):
+            value = data.get(field)
+            if isinstance(value, str) and value.strip():
+                idents.append(f'{field}:{value.strip().lower()}')
+        return idents
@@ -6,7 +6,8 @@ from .views import (TitlesViewSet,
                     GenresViewSet,
                     CategoriesViewSet,
                     ReviewViewset,
-                    CommentViewset)
+                    CommentViewset,
+                    TitleCommentViewset)
 from users import views
 
 routerv1 = DefaultRouter()
@@ -21,6 +22,10 @@ routerv1.register(
     CommentViewset,
     basename='comments'
 )
+routerv1.register(
+    r'^titles/(?P<title_id>\d+)/comments', TitleCommentViewset,
+    basename='title-comments'
+)
 
 app_name = 'api'
 
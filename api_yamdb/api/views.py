@@ -1,11 +1,20 @@
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
-from rest_framework import viewsets, filters, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework import viewsets, filters, mixins, status
 
+from .bulk import bulk_results, save_titles, validate_titles
+from .cache import CachedListMixin, bump_generation
 from .filters import TitleFilter
-from .pagination import Pagination
+from .mixins import (ConditionalGetMixin, ConditionalListMixin,
+                     SparseQuerysetMixin, TitleParentMixin)
+from .pagination import (Pagination, PubDateKeysetPagination,
+                         PubDatePagination, TitlePagination,
+                         TitleRankKeysetPagination)
 from .permissions import IsAuthorOrAdminOrModeratorOrReadOnly,\
     SuperuserOrAdminPermission
 from .serializers import (CategoriesSerializer,
@@ -13,32 +22,163 @@ from .serializers import (CategoriesSerializer,
                           GenresSerializer,
                           ReviewSerializer,
                           TitlesSerializer,
-                          TitlesCreateSerializer
+                          TitlesCreateSerializer,
+                          requested_expansions
                           )
+from api_yamdb.settings import (PURGE_INLINE_LIMIT,
+                                TITLE_LATEST_REVIEWS_LIMIT,
+                                TITLE_LATEST_REVIEWS_MAX_LIMIT,
+                                TITLES_BULK_MAX_ITEMS, TITLES_BULK_ON_ERROR)
 from reviews.models import (Categories,
+                            Comment,
                             Genres,
                             Title,
-                            Review)
+                            Review,
+                            CHOICES,
+                            score_count_field)
+from reviews.feeds import attach_latest_reviews
+from reviews.purge import delete_or_defer
+from reviews.ratings import upsert_review
 
+HISTOGRAM_FIELDS = tuple(score_count_field(score) for score, _ in CHOICES)
 
-class TitlesViewSet(viewsets.ModelViewSet):
+
+class TitlesViewSet(ConditionalGetMixin, CachedListMixin,
+                    SparseQuerysetMixin, viewsets.ModelViewSet):
     permission_classes = [SuperuserOrAdminPermission, ]
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).order_by('name')
+    queryset = Title.objects.visible().order_by('name')
+    select_related_fields = ('category',)
+    prefetch_related_fields = ('genre',)
     serializer_class = TitlesSerializer
-    pagination_class = Pagination
+    pagination_class = TitlePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     ordering_fields = ('name',)
     ordering = ('name',)
+    cache_resources = ('title', 'rating')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'top':
+            queryset = queryset.filter(rank_score__isnull=False)
+        return queryset
 
     def get_serializer_class(self):
-        if self.action in ('create', 'partial_update'):
+        if self.action in ('create', 'partial_update', 'bulk'):
             return TitlesCreateSerializer
         return TitlesSerializer
 
+    def get_etag_resources(self, request):
+        # Имена авторов в `?expand=latest_reviews`.
+        if 'latest_reviews' in requested_expansions(request):
+            return ('user',)
+        return ()
+
+    def get_latest_reviews_limit(self):
+        """Сколько последних отзывов вложить в каждое произведение;
+        None, если `?expand=latest_reviews` не запрошен."""
+        if (self.get_serializer_class() is not TitlesSerializer
+                or 'latest_reviews' not in requested_expansions(
+                    self.request)):
+            return None
+        value = self.request.query_params.get('latest_reviews_limit',
+                                              TITLE_LATEST_REVIEWS_LIMIT)
+        try:
+            limit = int(value)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= TITLE_LATEST_REVIEWS_MAX_LIMIT:
+            raise ValidationError({'latest_reviews_limit': [
+                f'Целое число от 1 до {TITLE_LATEST_REVIEWS_MAX_LIMIT}.'
+            ]})
+        return limit
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        limit = self.get_latest_reviews_limit()
+        if page is not None and limit is not None:
+            attach_latest_reviews(page, limit)
+        return page
+
+    def get_object(self):
+        title = super().get_object()
+        limit = self.get_latest_reviews_limit()
+        if limit is not None:
+            attach_latest_reviews([title], limit)
+        return title
+
+    @action(detail=False, methods=['get'],
+            pagination_class=TitleRankKeysetPagination)
+    def top(self, request):
+        """Произведения с отзывами по убыванию взвешенного рейтинга.
+
+        Фильтры те же, что у списка; страницы идут по индексу
+        (rank_score, id) без OFFSET и COUNT.
+        """
+        return self.list(request)
 
-class GenresViewSet(mixins.CreateModelMixin,
+    def perform_destroy(self, instance):
+        delete_or_defer(instance, PURGE_INLINE_LIMIT)
+        bump_generation('title')
+
+    @action(detail=True, methods=['get'], url_path='rating-histogram')
+    def rating_histogram(self, request, pk=None):
+        """Число отзывов с каждой оценкой от 1 до 10."""
+        title = get_object_or_404(
+            Title.objects.visible().only('id', 'review_count',
+                                         *HISTOGRAM_FIELDS),
+            pk=pk
+        )
+        return Response({
+            'id': title.pk,
+            'review_count': title.review_count,
+            'histogram': title.score_histogram,
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Пакетное создание и изменение произведений.
+
+        Элементы с `id` изменяются, без `id` — создаются. В ответе
+        результат по каждому элементу в порядке запроса.
+        """
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Ожидался список произведений.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > TITLES_BULK_MAX_ITEMS:
+            return Response(
+                {'detail': f'Не больше {TITLES_BULK_MAX_ITEMS} элементов.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        on_error = request.query_params.get('on_error', TITLES_BULK_ON_ERROR)
+        if on_error not in ('abort', 'skip'):
+            return Response({'on_error': ['Допустимо abort или skip.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        valid, errors = validate_titles(items)
+        saved = {}
+        response_status = status.HTTP_200_OK
+        if valid and not (errors and on_error == 'abort'):
+            try:
+                saved = save_titles(valid)
+            except IntegrityError:
+                # Пакет откатился целиком: например, параллельная запись
+                # заняла ключ или связь. Повтор запроса безопасен.
+                conflict = {'non_field_errors': [
+                    'Конфликт с параллельной записью, повторите запрос.'
+                ]}
+                errors.update((index, conflict) for index, _ in valid)
+                response_status = status.HTTP_409_CONFLICT
+        results = bulk_results(items, errors, saved)
+        if errors and not saved and response_status == status.HTTP_200_OK:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=response_status)
+
+
+class GenresViewSet(ConditionalListMixin,
+                    CachedListMixin,
+                    mixins.CreateModelMixin,
                     mixins.ListModelMixin,
                     mixins.DestroyModelMixin,
                     viewsets.GenericViewSet):
@@ -49,9 +189,12 @@ class GenresViewSet(mixins.CreateModelMixin,
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_resources = ('genres',)
 
 
-class CategoriesViewSet(mixins.CreateModelMixin,
+class CategoriesViewSet(ConditionalListMixin,
+                        CachedListMixin,
+                        mixins.CreateModelMixin,
                         mixins.ListModelMixin,
                         mixins.DestroyModelMixin,
                         viewsets.GenericViewSet):
@@ -62,39 +205,126 @@ class CategoriesViewSet(mixins.CreateModelMixin,
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_resources = ('categories',)
 
 
-class CommentViewset(viewsets.ModelViewSet):
+class CommentViewset(ConditionalGetMixin, SparseQuerysetMixin,
+                     viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     permission_classes = [IsAuthorOrAdminOrModeratorOrReadOnly, ]
-    pagination_class = PageNumberPagination
+    pagination_class = PubDatePagination
+    select_related_fields = ('author',)
+    # Поколений у комментариев нет: без COUNT ETag считается
+    # по самой странице.
+    page_validators = True
+    # Имена авторов комментариев и вложенного отзыва.
+    etag_resources = ('user',)
+
+    def get_review(self):
+        """Отзыв из URL, загружается один раз за запрос.
+
+        Автор подтягивается тем же запросом для `?expand=review`,
+        а комментариям отзыв проставляет менеджер review.comments.
+        """
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.visible().select_related('author'),
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+                title__deleted_at__isnull=True
+            )
+        return self._review
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id)
-        return review.comments.all()
+        return self.get_review().comments.visible()
+
+    def with_review_modified(self, request, probe):
+        # Вложенный отзыв меняет ответ, не трогая `updated_at` комментариев.
+        if probe is None or 'review' not in requested_expansions(request):
+            return probe
+        review_modified = self.get_review().updated_at
+        if probe['last_modified'] is not None:
+            review_modified = max(review_modified, probe['last_modified'])
+        return {**probe, 'last_modified': review_modified}
+
+    def get_list_probe(self, request):
+        return self.with_review_modified(
+            request, super().get_list_probe(request)
+        )
+
+    def get_page_probe(self, request, objects):
+        return self.with_review_modified(
+            request, super().get_page_probe(request, objects)
+        )
+
+    def get_detail_probe(self, request):
+        return self.with_review_modified(
+            request, super().get_detail_probe(request)
+        )
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(
-            Review,
-            id=review_id,
-            title=title_id
+        serializer.save(author=self.request.user, review=self.get_review())
+
+
+class TitleCommentViewset(TitleParentMixin, SparseQuerysetMixin,
+                          mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Все комментарии к отзывам произведения одной лентой."""
+    serializer_class = CommentSerializer
+    pagination_class = PubDateKeysetPagination
+    select_related_fields = ('author',)
+
+    def get_queryset(self):
+        queryset = Comment.objects.visible().filter(
+            review__title=self.get_title()
         )
-        serializer.save(author=self.request.user, review=review)
+        if 'review' in requested_expansions(self.request):
+            queryset = queryset.select_related('review__author')
+        return queryset
 
 
-class ReviewViewset(viewsets.ModelViewSet):
+class ReviewViewset(TitleParentMixin, ConditionalGetMixin,
+                    SparseQuerysetMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthorOrAdminOrModeratorOrReadOnly, ]
-    pagination_class = PageNumberPagination
+    pagination_class = PubDatePagination
+    # `title` берётся из get_title(): менеджер title.reviews
+    # проставляет его каждому отзыву без JOIN.
+    select_related_fields = ('author',)
+    # Поколений у отзывов нет: без COUNT ETag считается по самой
+    # странице.
+    page_validators = True
+    # Название произведения и имена авторов в каждом отзыве.
+    etag_resources = ('title', 'user')
 
     def get_queryset(self):
-        title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        return title.reviews.all()
+        return self.get_title().reviews.visible()
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        # Повторный отзыв отсекает ограничение unique_review,
+        # отдельная проверка exists() перед вставкой не нужна.
+        title = self.get_title()
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title=title)
+        except IntegrityError:
+            if not title.reviews.filter(author=self.request.user).exists():
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Вы не можете добавить ещё один отзыв на произведение'
+            ]})
+
+    @action(detail=False, methods=['put'], url_path='mine')
+    def mine(self, request, title_id=None):
+        """Создаёт или заменяет отзыв текущего пользователя."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        review, created = upsert_review(
+            self.get_title(), request.user,
+            serializer.validated_data['text'],
+            serializer.validated_data['score']
+        )
+        transaction.on_commit(lambda: bump_generation('rating'))
+        return Response(
+            self.get_serializer(review).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
@@ -74,6 +74,17 @@ DATABASES = {
 }
 
 
+# Cache
+# Кэш ответов и счётчиков пагинации должен быть общим для всех воркеров,
+# в продакшене здесь указывается Redis или Memcached.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -118,10 +129,21 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+    # Лимиты /auth/signup/ и /auth/token/ (api.throttling): по IP клиента
+    # и по username/email из запроса.
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '30/hour',
+        'signup_identifier': '5/hour',
+        'token_ip': '60/hour',
+        'token_identifier': '10/hour',
+    },
+    # IP клиента берётся из REMOTE_ADDR; за обратным прокси здесь
+    # указывается число прокси, чтобы учитывать X-Forwarded-For.
+    'NUM_PROXIES': 0,
 }
 
 SIMPLE_JWT = {
@@ -131,3 +153,42 @@ SIMPLE_JWT = {
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 PAGINATOR_PAGE_ITEMS_COUNT = 10
+PAGINATOR_COUNT_CACHE_TIMEOUT = 60 * 5
+PAGINATOR_COUNT_ESTIMATE_LIMIT = 1000
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+RESPONSE_CACHE_LOCK_TIMEOUT = 10
+RESPONSE_CACHE_WAIT = 5
+TITLES_BULK_MAX_ITEMS = 50000
+# abort — пакет с ошибками не сохраняется, skip — сохраняются
+# корректные элементы. Переопределяется параметром `?on_error=`.
+TITLES_BULK_ON_ERROR = 'abort'
+# Байесовский рейтинг для /titles/top/: средняя оценка с примесью
+# PRIOR_WEIGHT «виртуальных» отзывов с оценкой PRIOR_MEAN.
+TITLE_RANK_PRIOR_MEAN = 5.5
+TITLE_RANK_PRIOR_WEIGHT = 10
+# `?expand=latest_reviews`: отзывов на произведение по умолчанию и максимум.
+TITLE_LATEST_REVIEWS_LIMIT = 3
+TITLE_LATEST_REVIEWS_MAX_LIMIT = 20
+# Произведения и пользователи, у которых отзывов и комментариев больше
+# PURGE_INLINE_LIMIT, удаляются фоновой командой purge_deleted пачками
+# по PURGE_BATCH_SIZE отзывов; до этого они скрыты из API.
+PURGE_INLINE_LIMIT = 1000
+PURGE_BATCH_SIZE = 1000
+# Очередь писем: команда send_outbox отправляет до EMAIL_OUTBOX_BATCH_SIZE
+# писем через одно соединение. После ошибки попытка повторяется через
+# RETRY_DELAY секунд, задержка удваивается до MAX_DELAY. LEASE — через
+# сколько секунд письмо упавшего воркера снова берётся в работу.
+EMAIL_OUTBOX_BATCH_SIZE = 100
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_MAX_DELAY = 60 * 60
+EMAIL_OUTBOX_LEASE = 60 * 5
+EMAIL_OUTBOX_RETENTION = timedelta(days=7)
+# Поля пользователя для проверки прав хранятся в памяти воркера:
+# не больше AUTH_USER_CACHE_SIZE записей, каждая AUTH_USER_CACHE_TTL секунд.
+AUTH_USER_CACHE_SIZE = 10000
+AUTH_USER_CACHE_TTL = 60
+# Список пользователей: размер страницы по умолчанию и предел для
+# параметра `?page_size=`.
+USERS_PAGE_SIZE = 100
+USERS_MAX_PAGE_SIZE = 1000
@@ -0,0 +1,45 @@
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+
+from .models import Review
+
+
+def latest_reviews(title_ids, limit, using='default'):
+    """До `limit` новейших отзывов каждого произведения одним запросом.
+
+    Номер отзыва внутри произведения даёт ROW_NUMBER() OVER
+    (PARTITION BY title_id ORDER BY pub_date DESC). Django 3.2 не умеет
+    фильтровать по оконной функции, поэтому отбор по номеру вынесен
+    в подзапрос, а авторы подтягиваются JOIN внешнего запроса.
+    """
+    numbered = Review.objects.using(using).visible().filter(
+        title_id__in=title_ids
+    ).annotate(row_number=Window(
+        RowNumber(),
+        partition_by=[F('title_id')],
+        order_by=[F('pub_date').desc(), F('id').desc()],
+    )).order_by().values('id', 'row_number')
+    sql, params = numbered.query.sql_with_params()
+    quote = connections[using].ops.quote_name
+    newest = RawSQL(
+        f'SELECT {quote("id")} FROM ({sql}) {quote("numbered")} '
+        f'WHERE {quote("row_number")} <= %s',
+        (*params, limit)
+    )
+    return (Review.objects.using(using).filter(id__in=newest)
+            .select_related('author')
+            .order_by('title_id', '-pub_date', '-id'))
+
+
+def attach_latest_reviews(titles, limit):
+    """Записывает в `latest_reviews` каждого произведения его новейшие
+    отзывы; на все произведения выполняется один запрос."""
+    by_title = {}
+    for title in titles:
+        title.latest_reviews = by_title.setdefault(title.pk, [])
+    if by_title:
+        for review in latest_reviews(list(by_title), limit):
+            by_title[review.title_id].append(review)
+    return titles
@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-18 08:46
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+
+def fill_ranks(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    prior_mean = settings.TITLE_RANK_PRIOR_MEAN
+    prior_weight = settings.TITLE_RANK_PRIOR_WEIGHT
+    Title.objects.filter(review_count__gt=0).update(rank_score=(
+        (Cast(F('score_sum'), FloatField()) + prior_mean * prior_weight)
+        / (F('review_count') + prior_weight)
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rank_score',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Взвешенный рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['-rank_score', 'id'], name='title_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', '-rank_score', 'id'], name='title_category_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', '-rank_score', 'id'], name='title_year_rank_idx'),
+        ),
+        migrations.RunPython(fill_ranks, migrations.RunPython.noop),
+    ]
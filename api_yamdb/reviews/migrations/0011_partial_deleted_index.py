@@ -0,0 +1,22 @@
+# Generated by Django 3.2 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата удаления'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='title_deleted_idx'),
+        ),
+    ]
@@ -6,9 +6,23 @@ from .validators import year_validation
 CHOICES = [(i, i) for i in range(1, 11)]
 
 
+def score_count_field(score):
+    """Имя счётчика оценки `score` в гистограмме произведения."""
+    return f'score_{score}_count'
+
+
+def score_count(score):
+    return models.PositiveIntegerField(
+        default=0, editable=False, verbose_name=f'Число оценок {score}'
+    )
+
+
 class Categories(models.Model):
     name = models.CharField('Название', max_length=200)
     slug = models.SlugField('Индификатор', unique=True)
+    updated_at = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
 
     class Meta:
         verbose_name = 'Категория'
@@ -21,6 +35,9 @@ class Categories(models.Model):
 class Genres(models.Model):
     name = models.CharField('Название', max_length=200)
     slug = models.SlugField('Индификатор', unique=True)
+    updated_at = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
 
     class Meta:
         verbose_name = 'Жанр'
@@ -30,6 +47,13 @@ class Genres(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Без произведений, ожидающих фонового удаления."""
+        return self.filter(deleted_at__isnull=True)
+
+
 class Title(models.Model):
     id = models.AutoField(primary_key=True, editable=False)
     name = models.CharField(max_length=256, db_index=True,
@@ -45,15 +69,68 @@ class Title(models.Model):
                                  related_name='titles', blank=True, null=True)
     genre = models.ManyToManyField(Genres, verbose_name='Жанр',
                                    related_name='titles', blank=True)
+    rating = models.FloatField(null=True, blank=True, editable=False,
+                               verbose_name='Рейтинг')
+    review_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Сумма оценок'
+    )
+    # Гистограмма оценок: по счётчику на каждую оценку из CHOICES.
+    score_1_count = score_count(1)
+    score_2_count = score_count(2)
+    score_3_count = score_count(3)
+    score_4_count = score_count(4)
+    score_5_count = score_count(5)
+    score_6_count = score_count(6)
+    score_7_count = score_count(7)
+    score_8_count = score_count(8)
+    score_9_count = score_count(9)
+    score_10_count = score_count(10)
+    rank_score = models.FloatField(
+        null=True, blank=True, editable=False,
+        verbose_name='Взвешенный рейтинг'
+    )
+    # Заполняется, когда удаление передано фоновой очистке:
+    # произведение уже скрыто из API, но строки ещё удаляются.
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        verbose_name='Дата удаления'
+    )
+
+    objects = TitleQuerySet.as_manager()
+    updated_at = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
 
     class Meta:
         ordering = ('-year',)
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            # Порядок /titles/top/ целиком и внутри категории или года.
+            models.Index(fields=['-rank_score', 'id'],
+                         name='title_rank_idx'),
+            models.Index(fields=['category', '-rank_score', 'id'],
+                         name='title_category_rank_idx'),
+            models.Index(fields=['year', '-rank_score', 'id'],
+                         name='title_year_rank_idx'),
+            # Частичный: только строки для фоновой очистки. Обычный индекс
+            # планировщик выбирал для `deleted_at IS NULL` вместо индексов
+            # сортировки списков.
+            models.Index(fields=['deleted_at'], name='title_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def score_histogram(self):
+        return {score: getattr(self, score_count_field(score))
+                for score, _ in CHOICES}
+
 
 class GenreToTitle(models.Model):
     """Модель связывающая произведение с жанром"""
@@ -64,6 +141,13 @@ class GenreToTitle(models.Model):
         return f'{self.title} {self.genre}'
 
 
+class ReviewQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Без отзывов пользователей, ожидающих фонового удаления."""
+        return self.filter(author__deleted_at__isnull=True)
+
+
 class Review(models.Model):
 
     author = models.ForeignKey(
@@ -81,6 +165,10 @@ class Review(models.Model):
         verbose_name='Дата добавления', auto_now_add=True, db_index=True
     )
     score = models.PositiveSmallIntegerField(choices=CHOICES)
+    updated_at = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -92,6 +180,22 @@ class Review(models.Model):
                 name='unique_review'
             ),
         ]
+        indexes = [
+            # Отзывы произведения по дате и лента отзывов пользователя.
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='review_author_pub_date_idx'),
+        ]
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Без комментариев пользователей, ожидающих фонового удаления,
+        и комментариев к их отзывам."""
+        return self.filter(author__deleted_at__isnull=True,
+                           review__author__deleted_at__isnull=True)
 
 
 class Comment(models.Model):
@@ -109,8 +213,18 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(
         'Дата добавления', auto_now_add=True, db_index=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения', auto_now=True, db_index=True
+    )
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ['pub_date']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='comment_author_pub_date_idx'),
+        ]
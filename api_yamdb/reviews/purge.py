@@ -0,0 +1,149 @@
+"""Удаление произведений и пользователей с большим числом отзывов.
+
+Сборщик удаления Django загружает в память каждый отзыв (у модели
+есть сигналы), прежде чем удалить их пачками. Здесь отзывы
+и комментарии удаляются set-based запросами DELETE ... WHERE
+в порядке зависимостей, а сам объект — обычным delete(), когда
+зависимых строк уже не осталось.
+
+Небольшие объекты удаляются сразу. Для больших удаление только
+помечается (`deleted_at`): объект пропадает из API, а строки удаляет
+фоновая очистка (команда purge_deleted) пачками по `batch_size`
+отзывов, каждая в своей транзакции. Оценки помеченного пользователя
+снимаются с рейтинга сразу, а его отзывы и комментарии скрываются
+(`visible()`) до очистки.
+"""
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Comment, Review, Title
+from .ratings import retract_reviews
+from users.models import User
+
+
+def delete_reviews(reviews, retract=False):
+    """Удаляет отзывы queryset и комментарии к ним двумя DELETE.
+
+    С `retract=True` оценки сначала снимаются с рейтинга произведений.
+    Сигналы post_delete не отправляются.
+    """
+    using = reviews.db
+    if retract:
+        retract_reviews(reviews)
+    Comment.objects.using(using).filter(
+        review__in=reviews.order_by().values('pk')
+    )._raw_delete(using)
+    return reviews.order_by()._raw_delete(using)
+
+
+def count_dependent_rows(obj, limit):
+    """Число отзывов и комментариев, удаляемых вместе с объектом;
+    считается не дальше `limit + 1`."""
+    if isinstance(obj, Title):
+        # Счётчик отзывов хранится в произведении; без отзывов
+        # нет и комментариев к ним.
+        count = obj.review_count
+        if not count:
+            return 0
+        comments = Comment.objects.filter(review__title=obj)
+    else:
+        count = Review.objects.filter(author=obj).order_by()[
+            :limit + 1
+        ].count()
+        # Вместе с отзывами удаляются и чужие комментарии к ним.
+        comments = Comment.objects.filter(Q(author=obj)
+                                          | Q(review__author=obj))
+    if count <= limit:
+        count += comments.order_by()[:limit + 1 - count].count()
+    return count
+
+
+def delete_or_defer(obj, inline_limit):
+    """Удаляет произведение или пользователя сразу либо, если зависимых
+    строк больше `inline_limit`, помечает для фоновой очистки.
+    Возвращает True, если объект удалён сразу."""
+    if count_dependent_rows(obj, inline_limit) > inline_limit:
+        mark_deleted(obj)
+        return False
+    with transaction.atomic():
+        purge(obj)
+    return True
+
+
+def mark_deleted(obj):
+    """Скрывает объект из API до фоновой очистки."""
+    changes = {'deleted_at': timezone.now()}
+    if isinstance(obj, User):
+        # Неактивный пользователь не проходит аутентификацию.
+        changes['is_active'] = False
+    for field, value in changes.items():
+        setattr(obj, field, value)
+    if not isinstance(obj, User):
+        type(obj).objects.filter(pk=obj.pk).update(**changes)
+        return
+    with transaction.atomic():
+        # Скрытые отзывы не должны влиять на рейтинг до очистки.
+        retract_reviews(Review.objects.filter(author=obj))
+        # Через save(), чтобы post_save сбросил кэш аутентификации.
+        obj.save(update_fields=list(changes))
+
+
+def purge(obj, batch_size=None):
+    """Удаляет произведение или пользователя со всеми отзывами
+    и комментариями. Без `batch_size` вызывается внутри транзакции,
+    иначе каждая пачка отзывов выполняется в своей."""
+    if isinstance(obj, Title):
+        # Рейтинг удаляемого произведения пересчитывать незачем.
+        if obj.review_count or batch_size is not None:
+            purge_rows(Review.objects.filter(title=obj), batch_size)
+    else:
+        # Оценки помеченного пользователя сняты ещё в mark_deleted().
+        purge_rows(Review.objects.filter(author=obj), batch_size,
+                   retract=obj.deleted_at is None)
+        purge_rows(Comment.objects.filter(author=obj), batch_size)
+    with in_batch(batch_size):
+        obj.delete()
+
+
+def in_batch(batch_size):
+    """Отдельная транзакция для пачки; без `batch_size` запросы идут
+    в транзакции вызывающего кода."""
+    if batch_size is None:
+        return nullcontext()
+    return transaction.atomic()
+
+
+def purge_rows(queryset, batch_size=None, retract=False):
+    """Удаляет строки queryset отзывов или комментариев целиком либо
+    пачками по `batch_size`, каждую в отдельной транзакции."""
+    model = queryset.model
+    while True:
+        with in_batch(batch_size):
+            batch = queryset
+            if batch_size is not None:
+                ids = list(queryset.order_by('pk').values_list(
+                    'pk', flat=True
+                )[:batch_size])
+                if not ids:
+                    return
+                batch = model.objects.filter(pk__in=ids)
+            if model is Review:
+                delete_reviews(batch, retract=retract)
+            else:
+                batch.order_by()._raw_delete(batch.db)
+        if batch_size is None:
+            return
+
+
+def purge_deleted(batch_size):
+    """Доудаляет все объекты, помеченные mark_deleted().
+    Возвращает число удалённых объектов."""
+    purged = 0
+    for model in (Title, User):
+        for obj in model.objects.filter(deleted_at__isnull=False):
+            purge(obj, batch_size)
+            purged += 1
+    return purged
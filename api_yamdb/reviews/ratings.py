@@ -0,0 +1,203 @@
+from math import isclose
+
+from django.db import IntegrityError, transaction
+from django.db.models import (Avg, Case, Count, F, FloatField, OuterRef, Q,
+                              Subquery, Sum, Value, When)
+from django.db.models.functions import Cast, Coalesce, Now
+from django.utils import timezone
+
+from .models import CHOICES, Review, Title, score_count_field
+from api_yamdb.settings import (TITLE_RANK_PRIOR_MEAN,
+                                TITLE_RANK_PRIOR_WEIGHT)
+
+
+def rank_expression(score_sum, review_count, has_reviews):
+    """Байесовское среднее: оценки произведения вместе с априорными.
+
+    Произведение с одной десяткой не обгоняет произведение с тысячами
+    девяток. Без отзывов взвешенного рейтинга нет.
+    """
+    return Case(
+        When(has_reviews, then=(
+            (Cast(score_sum, FloatField())
+             + TITLE_RANK_PRIOR_MEAN * TITLE_RANK_PRIOR_WEIGHT)
+            / (review_count + TITLE_RANK_PRIOR_WEIGHT)
+        )),
+        default=Value(None),
+        output_field=FloatField(),
+    )
+
+
+def rank_value(score_sum, review_count):
+    """То же, что rank_expression, для значений в Python."""
+    if not review_count:
+        return None
+    return ((score_sum + TITLE_RANK_PRIOR_MEAN * TITLE_RANK_PRIOR_WEIGHT)
+            / (review_count + TITLE_RANK_PRIOR_WEIGHT))
+
+
+def update_title_rating(title_id, added=None, removed=None):
+    """Учитывает добавленную и/или снятую оценку одним UPDATE.
+
+    Сумма, число оценок и счётчики гистограммы считаются в SQL
+    от текущих значений, поэтому параллельные отзывы не затирают
+    друг друга.
+    """
+    scores = {}
+    if added is not None:
+        scores[added] = scores.get(added, 0) + 1
+    if removed is not None:
+        scores[removed] = scores.get(removed, 0) - 1
+    count_delta = (added is not None) - (removed is not None)
+    score_sum = F('score_sum') + (added or 0) - (removed or 0)
+    review_count = F('review_count') + count_delta
+    histogram = {score_count_field(score): F(score_count_field(score)) + delta
+                 for score, delta in scores.items() if delta}
+    has_reviews = Q(review_count__gt=-count_delta)
+    Title.objects.filter(pk=title_id).update(
+        score_sum=score_sum,
+        review_count=review_count,
+        rating=Case(
+            When(has_reviews,
+                 then=Cast(score_sum, FloatField()) / review_count),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+        rank_score=rank_expression(score_sum, review_count, has_reviews),
+        updated_at=Now(),
+        **histogram,
+    )
+
+
+def title_rating_expressions(reviews=None):
+    """Значения рейтинговых полей произведения, посчитанные по отзывам
+    (по умолчанию по всем видимым, иначе только по queryset `reviews`).
+
+    Оценки пользователей, ожидающих фонового удаления, уже сняты
+    с рейтинга в mark_deleted()."""
+    if reviews is None:
+        reviews = Review.objects.visible()
+    reviews = (reviews.filter(title=OuterRef('pk'))
+               .order_by().values('title'))
+    expressions = {
+        'review_count': Coalesce(
+            Subquery(reviews.annotate(value=Count('pk')).values('value')), 0
+        ),
+        'score_sum': Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value')), 0
+        ),
+        'rating': Subquery(
+            reviews.annotate(value=Avg('score')).values('value')
+        ),
+    }
+    for score, _ in CHOICES:
+        expressions[score_count_field(score)] = Coalesce(Subquery(
+            reviews.filter(score=score)
+            .annotate(value=Count('pk')).values('value')
+        ), 0)
+    return expressions
+
+
+def rebuild_title_ratings(titles=None):
+    """Пересчитывает рейтинг и гистограмму произведений по отзывам."""
+    if titles is None:
+        titles = Title.objects.all()
+    updated = titles.update(**title_rating_expressions(), updated_at=Now())
+    refresh_title_averages(titles)
+    return updated
+
+
+def refresh_title_averages(titles=None):
+    """Пересчитывает средний и взвешенный рейтинг по сохранённым сумме
+    и числу оценок, без обращения к отзывам: например, после смены
+    априорных параметров в настройках."""
+    if titles is None:
+        titles = Title.objects.all()
+    has_reviews = Q(review_count__gt=0)
+    return titles.update(
+        rating=Case(
+            When(has_reviews, then=(Cast(F('score_sum'), FloatField())
+                                    / F('review_count'))),
+            default=Value(None),
+            output_field=FloatField(),
+        ),
+        rank_score=rank_expression(F('score_sum'), F('review_count'),
+                                   has_reviews),
+    )
+
+
+def retract_reviews(reviews):
+    """Снимает оценки отзывов `reviews` с их произведений перед удалением
+    отзывов в обход сигналов: один UPDATE счётчиков по всем затронутым
+    произведениям и один — средних."""
+    removed = title_rating_expressions(reviews)
+    del removed['rating']
+    titles = Title.objects.using(reviews.db).filter(
+        pk__in=reviews.order_by().values('title_id')
+    )
+    titles.update(**{name: F(name) - value
+                     for name, value in removed.items()},
+                  updated_at=Now())
+    return refresh_title_averages(titles)
+
+
+def check_title_ratings(titles=None):
+    """Сверяет сохранённые рейтинговые поля с таблицей отзывов.
+
+    Возвращает список расхождений: id произведения, поле,
+    сохранённое и фактическое значения. Ничего не исправляет.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    expressions = title_rating_expressions()
+    rows = titles.order_by('pk').annotate(**{
+        f'actual_{name}': expression
+        for name, expression in expressions.items()
+    }).values('pk', 'rank_score', *expressions,
+              *(f'actual_{name}' for name in expressions))
+    mismatches = []
+    for row in rows.iterator():
+        row['actual_rank_score'] = rank_value(row['actual_score_sum'],
+                                              row['actual_review_count'])
+        for name in (*expressions, 'rank_score'):
+            stored, actual = row[name], row[f'actual_{name}']
+            if (name in ('rating', 'rank_score')
+                    and None not in (stored, actual)):
+                consistent = isclose(stored, actual)
+            else:
+                consistent = stored == actual
+            if not consistent:
+                mismatches.append((row['pk'], name, stored, actual))
+    return mismatches
+
+
+def upsert_review(title, author, text, score):
+    """Создаёт или заменяет отзыв автора на произведение.
+
+    Строка автора блокируется до конца транзакции, а замена пишется
+    одним UPDATE без сигналов: рейтинг сдвигается на разницу оценок.
+    Возвращает пару (отзыв, создан ли он).
+    """
+    with transaction.atomic():
+        reviews = Review.objects.select_for_update()
+        try:
+            review = reviews.get(title=title, author=author)
+        except Review.DoesNotExist:
+            try:
+                with transaction.atomic():
+                    return Review.objects.create(
+                        title=title, author=author, text=text, score=score
+                    ), True
+            except IntegrityError:
+                # Параллельный запрос успел вставить отзыв первым.
+                review = reviews.get(title=title, author=author)
+        review.title, review.author = title, author
+        previous_score = review.score
+        review.text, review.score = text, score
+        review.updated_at = timezone.now()
+        Review.objects.filter(pk=review.pk).update(
+            text=text, score=score, updated_at=review.updated_at
+        )
+        if score != previous_score:
+            update_title_rating(title.pk, added=score, removed=previous_score)
+    return review, False
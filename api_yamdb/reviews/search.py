@@ -0,0 +1,99 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+FTS_TABLE = 'reviews_title_fts'
+# Совпадение в названии важнее совпадения в описании.
+RANK_EXPRESSION = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+TOKEN_RE = re.compile(r'\w+')
+
+_enabled = {}
+
+
+def fts_enabled(using='default'):
+    """Есть ли в базе полнотекстовый индекс произведений (только SQLite)."""
+    if using not in _enabled:
+        connection = connections[using]
+        _enabled[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _enabled[using]
+
+
+def build_match_query(text):
+    """Превращает пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово ищется как префикс, все слова должны встретиться.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def index_title(title, using='default', created=False):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        if not created:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [title.pk])
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [title.pk, title.name, title.description or '']
+        )
+
+
+def index_titles(titles, using='default', created=False):
+    """Пакетная версия index_title для массовой загрузки."""
+    if not titles or not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        if not created:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                               [[title.pk] for title in titles])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [[title.pk, title.name, title.description or '']
+             for title in titles]
+        )
+
+
+def unindex_title(title_id, using='default'):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                       [title_id])
+
+
+def rebuild_title_index(using='default'):
+    """Заполняет индекс заново по таблице произведений."""
+    if not fts_enabled(using):
+        return 0
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            "SELECT id, name, COALESCE(description, '') FROM reviews_title"
+        )
+        return cursor.rowcount
+
+
+def search_titles(queryset, text):
+    """Произведения, подходящие под запрос, по убыванию релевантности."""
+    if not fts_enabled(queryset.db):
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        select={'search_rank': RANK_EXPRESSION},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+    ).order_by('search_rank', 'id')
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Review, Title
+from .ratings import update_title_rating
+from .search import index_title, unindex_title
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk is not None:
+        instance._previous = (
+            Review.objects.filter(pk=instance.pk)
+            .values_list('title_id', 'score').first()
+        )
+
+
+@receiver(post_save, sender=Review)
+def apply_review_score(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None:
+        update_title_rating(instance.title_id, added=instance.score)
+        return
+    title_id, score = previous
+    if title_id != instance.title_id:
+        update_title_rating(title_id, removed=score)
+        update_title_rating(instance.title_id, added=instance.score)
+    elif score != instance.score:
+        update_title_rating(title_id, added=instance.score, removed=score)
+
+
+@receiver(post_delete, sender=Review)
+def revert_review_score(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, removed=instance.score)
+
+
+@receiver(post_save, sender=Title)
+def index_saved_title(sender, instance, created, using, update_fields,
+                      **kwargs):
+    if update_fields and not {'name', 'description'} & set(update_fields):
+        return
+    index_title(instance, using, created)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_deleted_title(sender, instance, using, **kwargs):
+    unindex_title(instance.pk, using)
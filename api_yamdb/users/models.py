@@ -2,6 +2,7 @@ import re
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Upper
 from django.core.exceptions import ValidationError
 
 
@@ -59,6 +60,60 @@ class User(AbstractUser):
     )
 
     confirmation_code = models.CharField(max_length=10)
+    # Входит в токены доступа; увеличивается в save() при смене полей
+    # TOKEN_FIELDS, и выданные раньше токены перестают приниматься.
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        editable=False
+    )
+    # Заполняется, когда удаление передано фоновой очистке.
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False,
+        verbose_name='Дата удаления'
+    )
+
+    class Meta:
+        verbose_name = 'user'
+        verbose_name_plural = 'users'
+        indexes = [
+            # Частичный: только строки для фоновой очистки, иначе индекс
+            # выбирается для `deleted_at IS NULL` в списке пользователей.
+            models.Index(fields=['deleted_at'], name='user_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+            # Поиск по префиксу без учёта регистра в списке пользователей.
+            models.Index(Upper('username'), name='user_username_upper_idx'),
+            models.Index(Upper('email'), name='user_email_upper_idx'),
+            models.Index(fields=['role', 'username'],
+                         name='user_role_username_idx'),
+        ]
+
+    # Поля, которые токен доступа несёт в claims.
+    TOKEN_FIELDS = ('role', 'is_superuser')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user.remember_token_fields()
+        return user
+
+    def remember_token_fields(self):
+        # Только загруженные поля: отложенные не читаются из БД.
+        self._saved_token_fields = {
+            field: self.__dict__[field] for field in self.TOKEN_FIELDS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        saved = getattr(self, '_saved_token_fields', {})
+        if any(getattr(self, field) != value
+               for field, value in saved.items()):
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self.remember_token_fields()
 
     def check_confirmation_code(self, confirmation_code):
         return self.confirmation_code == confirmation_code
@@ -73,3 +128,69 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки фоновой командой send_outbox."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    statuses = (
+        (PENDING, 'pending'),
+        (SENT, 'sent'),
+        (FAILED, 'failed'),
+    )
+    email = models.EmailField(
+        verbose_name='Адрес получателя',
+        max_length=254
+    )
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=255
+    )
+    body = models.TextField(verbose_name='Текст')
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=10,
+        default=PENDING,
+        choices=statuses
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Дата постановки в очередь',
+        auto_now_add=True
+    )
+    # Не раньше этого времени письмо берётся в работу: после ошибки
+    # отправки здесь время следующей попытки, на время отправки —
+    # срок, после которого письмо упавшего воркера отправится снова.
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка'
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+        default=''
+    )
+
+    class Meta:
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Очередь писем'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outbox_due_idx'),
+            models.Index(fields=['email', 'status'],
+                         name='outbox_email_idx'),
+            models.Index(fields=['status', 'sent_at'],
+                         name='outbox_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.email}: {self.subject}'
@@ -0,0 +1,170 @@
+"""Очередь писем (outbox).
+
+Письма записываются в таблицу OutboxEmail в транзакции запроса,
+а отправляет их команда send_outbox: пачками по `batch_size`,
+через одно SMTP-соединение на пачку. После ошибки письмо повторяется
+с удваивающейся задержкой, после EMAIL_OUTBOX_MAX_ATTEMPTS попыток
+получает статус failed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, DurationField, F, Max, Min, Q
+from django.db.models import Avg, ExpressionWrapper
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+
+def enqueue_email(email, subject, body):
+    """Ставит письмо в очередь; вызывается в транзакции запроса.
+
+    Неотправленное письмо с той же темой на тот же адрес заменяется:
+    из нескольких кодов подтверждения действует только последний.
+    """
+    OutboxEmail.objects.filter(
+        email=email, subject=subject, status=OutboxEmail.PENDING
+    ).delete()
+    return OutboxEmail.objects.create(
+        email=email, subject=subject, body=body,
+        next_attempt_at=timezone.now()
+    )
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой после `attempts` неудачных."""
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_DELAY))
+
+
+def claim_batch(batch_size, now):
+    """Забирает в работу до `batch_size` писем, срок которых подошёл.
+
+    Письма сдвигаются на EMAIL_OUTBOX_LEASE вперёд, поэтому другой
+    воркер их не возьмёт, а после падения этого воркера они
+    отправятся снова.
+    """
+    with transaction.atomic():
+        batch = list(OutboxEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status=OutboxEmail.PENDING, next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'id')[:batch_size])
+        OutboxEmail.objects.filter(pk__in=[mail.pk for mail in batch]).update(
+            next_attempt_at=now + timedelta(
+                seconds=settings.EMAIL_OUTBOX_LEASE
+            )
+        )
+    return batch
+
+
+def coalesce(batch):
+    """Оставляет из писем с одним адресом и темой самое позднее.
+    Возвращает оставленные письма и id заменённых."""
+    latest = {}
+    for mail in batch:
+        key = (mail.email, mail.subject)
+        if key not in latest or latest[key].pk < mail.pk:
+            latest[key] = mail
+    kept = set(mail.pk for mail in latest.values())
+    return (sorted(latest.values(), key=lambda mail: mail.pk),
+            [mail.pk for mail in batch if mail.pk not in kept])
+
+
+def deliver(batch):
+    """Отправляет пачку через одно соединение. Возвращает id
+    отправленных писем и словарь ошибок по id неотправленных."""
+    sent, errors = [], {}
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for mail in batch:
+                message = EmailMessage(
+                    mail.subject, mail.body, settings.EMAIL_HOST_USER,
+                    [mail.email], connection=connection
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    errors[mail.pk] = repr(error)
+                else:
+                    sent.append(mail.pk)
+    except Exception as error:
+        # Соединение не открылось или оборвалось: всё, что не ушло,
+        # повторяется позже.
+        errors.update((mail.pk, repr(error)) for mail in batch
+                      if mail.pk not in sent and mail.pk not in errors)
+    return sent, errors
+
+
+def record_results(batch, sent, errors, now):
+    OutboxEmail.objects.filter(pk__in=sent).update(
+        status=OutboxEmail.SENT, sent_at=now,
+        attempts=F('attempts') + 1, last_error=''
+    )
+    for mail in batch:
+        if mail.pk not in errors:
+            continue
+        attempts = mail.attempts + 1
+        changes = {'attempts': attempts, 'last_error': errors[mail.pk]}
+        if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+            changes['status'] = OutboxEmail.FAILED
+        else:
+            changes['next_attempt_at'] = now + retry_delay(attempts)
+        OutboxEmail.objects.filter(pk=mail.pk).update(**changes)
+
+
+def send_outbox(batch_size):
+    """Отправляет все письма, срок которых подошёл.
+    Возвращает число отправленных, заменённых и неотправленных."""
+    result = {'sent': 0, 'coalesced': 0, 'failed': 0}
+    started = timezone.now()
+    while True:
+        batch = claim_batch(batch_size, started)
+        if not batch:
+            break
+        batch, superseded = coalesce(batch)
+        OutboxEmail.objects.filter(pk__in=superseded).delete()
+        sent, errors = deliver(batch)
+        record_results(batch, sent, errors, timezone.now())
+        result['sent'] += len(sent)
+        result['coalesced'] += len(superseded)
+        result['failed'] += len(errors)
+    return result
+
+
+def delete_sent(older_than):
+    """Удаляет отправленные письма старше `older_than`."""
+    count, _ = OutboxEmail.objects.filter(
+        status=OutboxEmail.SENT, sent_at__lt=timezone.now() - older_than
+    ).delete()
+    return count
+
+
+def outbox_stats(window=timedelta(hours=1)):
+    """Глубина очереди и задержка доставки писем за последний `window`.
+
+    Задержка — время от постановки в очередь до отправки.
+    """
+    now = timezone.now()
+    stats = OutboxEmail.objects.aggregate(
+        pending=Count('pk', filter=Q(status=OutboxEmail.PENDING)),
+        due=Count('pk', filter=Q(status=OutboxEmail.PENDING,
+                                 next_attempt_at__lte=now)),
+        failed=Count('pk', filter=Q(status=OutboxEmail.FAILED)),
+        oldest_pending=Min('created_at',
+                           filter=Q(status=OutboxEmail.PENDING)),
+    )
+    latency = ExpressionWrapper(F('sent_at') - F('created_at'),
+                                output_field=DurationField())
+    stats.update(OutboxEmail.objects.filter(
+        status=OutboxEmail.SENT, sent_at__gte=now - window
+    ).aggregate(
+        sent=Count('pk'),
+        latency_avg=Avg(latency),
+        latency_max=Max(latency),
+    ))
+    oldest = stats.pop('oldest_pending')
+    stats['oldest_pending_age'] = now - oldest if oldest else None
+    return stats
@@ -1,28 +1,30 @@
-from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect
-from rest_framework.pagination import PageNumberPagination
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework import generics, status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 
 from .models import User
+from .outbox import enqueue_email
+from api.authentication import token_for_user
+from api.cache import bump_generation
+from api.filters import UserFilter
+from api.pagination import UserPagination
 from api.permissions import AdminPermission
+from api.throttling import AuthIdentifierThrottle, AuthIPThrottle
+from reviews.purge import delete_or_defer
 from .serializers import (UserSerializer,
                           FullUserSerializer,
                           TokenSerializer,
                           PatchUserSerializer)
 
 
-class PageNumberPaginationWithEmpty(PageNumberPagination):
-    page_size = 1
-
-
 def assert_required_fields_in_response(response_data, required_fields):
 
     for field in required_fields:
@@ -32,6 +34,9 @@ def assert_required_fields_in_response(response_data, required_fields):
 
 @method_decorator(csrf_protect, name='dispatch')
 class SignupView(generics.GenericAPIView):
+    throttle_classes = (AuthIPThrottle, AuthIdentifierThrottle)
+    throttle_scope = 'signup'
+    throttle_identifier_fields = ('username', 'email')
 
     def post(self, request):
         username = request.data.get('username')
@@ -40,28 +45,32 @@ class SignupView(generics.GenericAPIView):
             return Response({'field_name': ['username']},
                             status=status.HTTP_400_BAD_REQUEST)
         try:
-            user = User.objects.get(username=username, email=email)
+            user = User.objects.get(username=username, email=email,
+                                    deleted_at__isnull=True)
             serializer = UserSerializer(user, data=request.data, partial=True)
         except User.DoesNotExist:
             user = None
             serializer = UserSerializer(data=request.data)
         if serializer.is_valid():
             confirmation_code = User.objects.make_random_password(length=6)
-            serializer.save(confirmation_code=confirmation_code)
-
-            send_mail(
-                'Confirm your account',
-                f'Your confirmation code is: {confirmation_code}',
-                settings.EMAIL_HOST_USER,
-                [serializer.data['email']],
-                fail_silently=False,
-            )
+            # Письмо отправит команда send_outbox: регистрация
+            # не ждёт SMTP и не падает из-за него.
+            with transaction.atomic():
+                serializer.save(confirmation_code=confirmation_code)
+                enqueue_email(
+                    serializer.data['email'],
+                    'Confirm your account',
+                    f'Your confirmation code is: {confirmation_code}',
+                )
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @method_decorator(csrf_protect, name='dispatch')
 class TokenView(generics.GenericAPIView):
+    throttle_classes = (AuthIPThrottle, AuthIdentifierThrottle)
+    throttle_scope = 'token'
+    throttle_identifier_fields = ('username',)
 
     def post(self, request):
         username = request.data.get('username')
@@ -74,30 +83,32 @@ class TokenView(generics.GenericAPIView):
 
         # Authenticate user using confirmation code
         try:
-            user = User.objects.get(username=username)
+            user = User.objects.get(username=username,
+                                    deleted_at__isnull=True)
         except User.DoesNotExist:
             return Response('No user', status=status.HTTP_404_NOT_FOUND)
         if not user.check_confirmation_code(confirmation_code):
             return Response({'error': 'Invalid confirmation code.'},
                             status=status.HTTP_401_UNAUTHORIZED)
 
-        refresh = RefreshToken.for_user(user)
-        access = str(refresh.access_token)
-
-        return Response({'token': access})
+        return Response({'token': str(token_for_user(user))})
 
 
 @method_decorator(csrf_protect, name='dispatch')
 class ProfileManage(GenericAPIView):
+    """Список пользователей по username: страницы `?page=` или
+    `?cursor=`, размер `?page_size=`, фильтры `?search=` (префикс
+    username или email) и `?role=`."""
     permission_classes = [AdminPermission]
-    pagination_class = PageNumberPaginationWithEmpty
+    pagination_class = UserPagination
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = UserFilter
+    queryset = User.objects.filter(deleted_at__isnull=True).order_by(
+        'username'
+    )
 
     def get(self, request):
-        username = request.query_params.get('search', None)
-        if username is None:
-            users = User.objects.all()
-        else:
-            users = User.objects.filter(username=username)
+        users = self.filter_queryset(self.get_queryset())
         page = self.paginate_queryset(users)
         serializer = FullUserSerializer(page, many=True)
         return self.get_paginated_response(serializer.data)
@@ -123,9 +134,11 @@ class ProfileActions(APIView):
     def get(self, request, username):
         try:
             if username == 'me':
-                user = request.user
+                # В request.user загружены только поля для проверки прав.
+                user = User.objects.get(pk=request.user.pk)
             else:
-                user = User.objects.get(username=username)
+                user = User.objects.get(username=username,
+                                        deleted_at__isnull=True)
         except User.DoesNotExist:
             return Response('User not found', status=status.HTTP_404_NOT_FOUND)
 
@@ -134,7 +147,7 @@ class ProfileActions(APIView):
 
     def patch(self, request, username):
         if username == 'me':
-            user = request.user
+            user = User.objects.get(pk=request.user.pk)
             serializer = PatchUserSerializer(user,
                                              data=request.data,
                                              partial=True)
@@ -145,7 +158,8 @@ class ProfileActions(APIView):
                 return Response(serializer.errors,
                                 status=status.HTTP_400_BAD_REQUEST)
         else:
-            user = User.objects.get(username=username)
+            user = get_object_or_404(User, username=username,
+                                     deleted_at__isnull=True)
             serializer = FullUserSerializer(user,
                                             data=request.data,
                                             partial=True)
@@ -160,7 +174,11 @@ class ProfileActions(APIView):
         if username == 'me':
             return Response('Method not allowed',
                             status=status.HTTP_405_METHOD_NOT_ALLOWED)
-        user = get_object_or_404(User, username=username)
+        user = get_object_or_404(User, username=username,
+                                 deleted_at__isnull=True)
 
-        user.delete()
+        # Отзывы и комментарии удаляются set-based запросами,
+        # у активных авторов — фоновой командой purge_deleted.
+        delete_or_defer(user, settings.PURGE_INLINE_LIMIT)
+        bump_generation('rating')
         return Response('User deleted', status=status.HTTP_204_NO_CONTENT)
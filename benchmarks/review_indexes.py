@@ -0,0 +1,162 @@
+"""Составные индексы отзывов и комментариев: планы и время запросов.
+
+Запуск из корня репозитория:
+    python benchmarks/review_indexes.py --reviews 10000000
+
+База создаётся во временном файле, рабочая БД проекта не затрагивается.
+Сначала запросы выполняются с одностолбцовыми индексами из 0001_initial,
+затем создаются индексы из 0007_nested_pub_date_indexes и запросы
+повторяются. Запросы повторяют SQL страниц `/titles/{id}/reviews/`,
+`/titles/{id}/reviews/{id}/comments/` (в том числе `?cursor=`)
+и выборки отзывов одного автора.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+SCHEMA = (
+    'CREATE TABLE reviews_review ('
+    'id INTEGER PRIMARY KEY, title_id INTEGER, author_id INTEGER, '
+    'text TEXT, pub_date DATETIME, score SMALLINT);'
+    'CREATE TABLE reviews_comment ('
+    'id INTEGER PRIMARY KEY, review_id INTEGER, author_id INTEGER, '
+    'text TEXT, pub_date DATETIME);'
+    'CREATE INDEX reviews_review_title_id ON reviews_review (title_id);'
+    'CREATE INDEX reviews_review_author_id ON reviews_review (author_id);'
+    'CREATE INDEX reviews_review_pub_date ON reviews_review (pub_date);'
+    'CREATE INDEX reviews_comment_review_id ON reviews_comment (review_id);'
+    'CREATE INDEX reviews_comment_author_id ON reviews_comment (author_id);'
+    'CREATE INDEX reviews_comment_pub_date ON reviews_comment (pub_date);'
+)
+COMPOSITE = (
+    'CREATE INDEX review_title_pub_date_idx '
+    'ON reviews_review (title_id, pub_date, id);'
+    'CREATE INDEX review_author_pub_date_idx '
+    'ON reviews_review (author_id, pub_date);'
+    'CREATE INDEX comment_review_pub_date_idx '
+    'ON reviews_comment (review_id, pub_date, id);'
+    'CREATE INDEX comment_author_pub_date_idx '
+    'ON reviews_comment (author_id, pub_date);'
+    'ANALYZE;'
+)
+REVIEW_COLUMNS = 'id, title_id, author_id, text, pub_date, score'
+QUERIES = (
+    ('отзывы: страница',
+     f'SELECT {REVIEW_COLUMNS} FROM reviews_review WHERE title_id = :title '
+     'ORDER BY pub_date, id LIMIT 11'),
+    ('отзывы: курсор',
+     f'SELECT {REVIEW_COLUMNS} FROM reviews_review WHERE title_id = :title '
+     'AND pub_date >= :date AND (pub_date > :date '
+     'OR (pub_date = :date AND id > :id)) ORDER BY pub_date, id LIMIT 11'),
+    ('отзывы: ключи',
+     'SELECT id, pub_date FROM reviews_review WHERE title_id = :title '
+     'ORDER BY pub_date DESC, id DESC LIMIT 11'),
+    ('отзывы: автор',
+     f'SELECT {REVIEW_COLUMNS} FROM reviews_review WHERE author_id = :author '
+     'ORDER BY pub_date DESC LIMIT 11'),
+    ('комментарии',
+     'SELECT id, review_id, author_id, text, pub_date FROM reviews_comment '
+     'WHERE review_id = :review ORDER BY pub_date, id LIMIT 11'),
+    ('комм.: автор',
+     'SELECT id, review_id, author_id, text, pub_date FROM reviews_comment '
+     'WHERE author_id = :author ORDER BY pub_date DESC LIMIT 11'),
+)
+
+
+def fill(connection, reviews, titles, authors, seed):
+    rng = random.Random(seed)
+    connection.executescript(SCHEMA)
+    # Даты идут вразнобой с id, как у отзывов, загруженных из CSV.
+    connection.executemany(
+        'INSERT INTO reviews_review VALUES (?, ?, ?, ?, ?, ?)',
+        ((idx, rng.randrange(1, titles + 1), rng.randrange(1, authors + 1),
+          f'Отзыв {idx}',
+          f'20{rng.randrange(10, 26)}-{rng.randrange(1, 13):02}-'
+          f'{rng.randrange(1, 29):02} {rng.randrange(24):02}:00:00',
+          rng.randrange(1, 11))
+         for idx in range(1, reviews + 1))
+    )
+    connection.execute(
+        'INSERT INTO reviews_comment (review_id, author_id, text, pub_date) '
+        'SELECT id, author_id, text, pub_date FROM reviews_review '
+        'WHERE id % 10 = 0'
+    )
+    connection.execute('ANALYZE')
+    connection.commit()
+
+
+def hot_params(connection):
+    title = connection.execute(
+        'SELECT title_id FROM reviews_review GROUP BY title_id '
+        'ORDER BY COUNT(*) DESC LIMIT 1'
+    ).fetchone()[0]
+    date, review_id = connection.execute(
+        'SELECT pub_date, id FROM reviews_review WHERE title_id = ? '
+        'ORDER BY pub_date, id LIMIT 1 OFFSET 10', (title,)
+    ).fetchone()
+    review = connection.execute(
+        'SELECT review_id FROM reviews_comment LIMIT 1'
+    ).fetchone()[0]
+    return {'title': title, 'date': date, 'id': review_id,
+            'review': review, 'author': 1}
+
+
+def timed(connection, sql, params, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def plan(connection, sql, params):
+    return '; '.join(row[-1] for row in connection.execute(
+        f'EXPLAIN QUERY PLAN {sql}', params
+    ))
+
+
+def run(connection, params, repeat):
+    return {label: (timed(connection, sql, params, repeat),
+                    plan(connection, sql, params))
+            for label, sql in QUERIES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reviews', type=int, default=10_000_000)
+    parser.add_argument('--titles', type=int, default=20_000)
+    parser.add_argument('--authors', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'bench.db'))
+        started = time.perf_counter()
+        fill(connection, args.reviews, args.titles, args.authors, args.seed)
+        print(f'{args.reviews} отзывов загружено за '
+              f'{time.perf_counter() - started:.1f} с')
+        params = hot_params(connection)
+
+        before = run(connection, params, args.repeat)
+        connection.executescript(COMPOSITE)
+        after = run(connection, params, args.repeat)
+
+        print(f'{"запрос":<18}{"было, мс":>12}{"стало, мс":>12}')
+        for label, _ in QUERIES:
+            print(f'{label:<18}{before[label][0]:>12.2f}'
+                  f'{after[label][0]:>12.2f}')
+        print()
+        for label, _ in QUERIES:
+            print(f'{label}:\n  было:  {before[label][1]}\n'
+                  f'  стало: {after[label][1]}')
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
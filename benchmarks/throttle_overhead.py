@@ -0,0 +1,98 @@
+"""Накладные расходы лимитов /auth/signup/ и /auth/token/ на запрос.
+
+Запуск из корня репозитория:
+    python benchmarks/throttle_overhead.py --requests 20000
+
+БД не используется: POST к TokenView без username отклоняется
+валидацией. Сравниваются время такого запроса с лимитами
+представления и без них, а также отдельный вызов allow_request()
+обоих лимитов. Кэш — из настроек проекта (LocMemCache); с Redis
+или Memcached к каждому лимиту добавляются сетевые обращения:
+incr на каждый идентификатор (add в начале окна) и get_many
+предыдущих окон.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from api.throttling import (AuthIdentifierThrottle, AuthIPThrottle,  # noqa
+                            SlidingWindowThrottle)
+from users.views import TokenView  # noqa: E402
+
+URL = '/api/v1/auth/token/'
+
+
+class UnthrottledTokenView(TokenView):
+    throttle_classes = ()
+
+
+def timed(func, count):
+    started = time.perf_counter()
+    for idx in range(count):
+        func(idx)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--clients', type=int, default=1000,
+                        help='Сколько разных IP и username чередовать')
+    args = parser.parse_args()
+
+    # Лимиты не должны срабатывать: измеряется путь разрешённого запроса.
+    SlidingWindowThrottle.THROTTLE_RATES = {
+        f'token_{suffix}': f'{args.requests * 10}/hour'
+        for suffix in ('ip', 'identifier')
+    }
+    factory = APIRequestFactory()
+    requests = [factory.post(URL, {'confirmation_code': '1'},
+                             REMOTE_ADDR=f'10.0.{idx // 256}.{idx % 256}')
+                for idx in range(args.clients)]
+    views = {
+        'без лимитов': UnthrottledTokenView.as_view(),
+        'с лимитами': TokenView.as_view(),
+    }
+
+    results = {}
+    for label, view in views.items():
+        cache.clear()
+        view(requests[0])
+        results[label] = timed(
+            lambda idx: view(requests[idx % args.clients]), args.requests
+        )
+
+    cache.clear()
+    drf_request = TokenView().initialize_request(requests[0])
+    throttles = (AuthIPThrottle(), AuthIdentifierThrottle())
+    identities = [{'username': f'user{idx}'} for idx in range(args.clients)]
+
+    def check(idx):
+        drf_request._full_data = identities[idx % args.clients]
+        for throttle in throttles:
+            throttle.allow_request(drf_request, TokenView)
+
+    check_time = timed(check, args.requests)
+
+    for label, value in results.items():
+        print(f'{label:<14}{value:>10.1f} мкс на запрос')
+    overhead = results['с лимитами'] - results['без лимитов']
+    print(f'{"разница":<14}{overhead:>10.1f} мкс '
+          f'({overhead / results["без лимитов"] * 100:.1f}%)')
+    print(f'{"allow_request":<14}{check_time:>10.1f} мкс на оба лимита')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Сравнение поиска произведений: LIKE '%...%' против индекса FTS5.
+
+Запуск из корня репозитория:
+    python benchmarks/title_search.py --titles 1000000
+
+База создаётся во временном файле, рабочая БД проекта не затрагивается.
+Запросы повторяют SQL, который строят `TitleFilter.name` (icontains)
+и `TitleFilter.search` (reviews.search.search_titles).
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+WORDS = (
+    'война мир любовь ночь город море звезда тень дорога время '
+    'последний первый тайна история песня король дом сад огонь зима'
+).split()
+
+LIKE_SQL = (
+    "SELECT id, name FROM reviews_title WHERE name LIKE ? ESCAPE '\\' "
+    'ORDER BY name LIMIT 10'
+)
+LIKE_COUNT_SQL = (
+    "SELECT COUNT(*) FROM reviews_title WHERE name LIKE ? ESCAPE '\\'"
+)
+FTS_SQL = (
+    'SELECT reviews_title.id, reviews_title.name, '
+    'bm25(reviews_title_fts, 10.0, 1.0) AS search_rank '
+    'FROM reviews_title, reviews_title_fts '
+    'WHERE reviews_title_fts.rowid = reviews_title.id '
+    'AND reviews_title_fts MATCH ? ORDER BY search_rank, id LIMIT 10'
+)
+FTS_COUNT_SQL = (
+    'SELECT COUNT(*) FROM reviews_title, reviews_title_fts '
+    'WHERE reviews_title_fts.rowid = reviews_title.id '
+    'AND reviews_title_fts MATCH ?'
+)
+
+
+def fill(connection, titles, seed):
+    rng = random.Random(seed)
+    connection.executescript(
+        'CREATE TABLE reviews_title ('
+        'id INTEGER PRIMARY KEY, name VARCHAR(256), description TEXT);'
+        'CREATE INDEX reviews_title_name ON reviews_title (name);'
+        'CREATE VIRTUAL TABLE reviews_title_fts USING fts5('
+        "name, description, tokenize = 'unicode61 remove_diacritics 2');"
+    )
+    rows = (
+        (idx,
+         ' '.join(rng.choices(WORDS, k=3)) + f' {idx}',
+         ' '.join(rng.choices(WORDS, k=12)))
+        for idx in range(1, titles + 1)
+    )
+    connection.executemany('INSERT INTO reviews_title VALUES (?, ?, ?)',
+                           rows)
+    connection.execute(
+        'INSERT INTO reviews_title_fts (rowid, name, description) '
+        'SELECT id, name, description FROM reviews_title'
+    )
+    connection.commit()
+
+
+def timed(connection, sql, params, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, 'bench.db'))
+        started = time.perf_counter()
+        fill(connection, args.titles, args.seed)
+        print(f'{args.titles} произведений загружено за '
+              f'{time.perf_counter() - started:.1f} с')
+
+        print(f'{"запрос":<12}{"LIKE, мс":>12}{"FTS5, мс":>12}')
+        # Частые слова, префикс и редкий токен, который LIKE ищет
+        # полным просмотром таблицы.
+        for word in ('тайна', 'корол', 'море ночь', str(args.titles // 2)):
+            like = [f'%{word}%']
+            match = [' '.join(f'"{token}"*' for token in word.split())]
+            for label, like_sql, fts_sql in (
+                    ('страница', LIKE_SQL, FTS_SQL),
+                    ('COUNT(*)', LIKE_COUNT_SQL, FTS_COUNT_SQL)):
+                like_ms = timed(connection, like_sql, like, args.repeat)
+                fts_ms = timed(connection, fts_sql, match, args.repeat)
+                print(f'{word:<12}{like_ms:>12.1f}{fts_ms:>12.1f}  {label}')
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Title
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_writes(self, admin_client, admin, user,
+                                             user_client, moderator,
+                                             moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.review_count, title.score_sum) == (3, 15), (
+            'Проверьте, что при создании отзыва у произведения обновляются '
+            'поля `review_count` и `score_sum`.'
+        )
+        assert self.get_title(admin_client, title_id)['rating'] == 5
+
+        user_client.patch(f'{url}{reviews[1]["id"]}/', data={'score': 8})
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (3, 18), (
+            'Проверьте, что при изменении оценки отзыва сумма оценок '
+            'произведения пересчитывается.'
+        )
+        assert title.rating == 6
+
+        user_client.delete(f'{url}{reviews[1]["id"]}/')
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (2, 10), (
+            'Проверьте, что при удалении отзыва рейтинг произведения '
+            'пересчитывается.'
+        )
+
+        moderator.delete()
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        title.refresh_from_db()
+        assert (title.review_count, title.score_sum) == (0, 0), (
+            'Проверьте, что каскадное удаление отзывов вместе с автором '
+            'пересчитывает рейтинг произведения.'
+        )
+        assert self.get_title(admin_client, title_id)['rating'] is None
+
+    def test_02_rebuild_ratings_command(self, admin_client, admin, user,
+                                        user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        Title.objects.update(rating=None, review_count=0, score_sum=0)
+
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating, title.review_count, title.score_sum) == (
+            5, 2, 10
+        ), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает рейтинг '
+            'произведений по отзывам.'
+        )
+        empty = Title.objects.get(pk=titles[1]['id'])
+        assert (empty.rating, empty.review_count) == (None, 0)
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+# Допустимое число SQL-запросов на действие с произведениями.
+# Аутентификация по JWT (один запрос к users_user) входит в бюджет.
+QUERY_BUDGET = {
+    'list': 3,
+    'retrieve': 3,
+    'create': 10,
+    'partial_update': 12,
+    'destroy': 9,
+}
+
+
+def add_titles(admin_client, genres, count):
+    for idx in range(count):
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': f'Произведение {idx}',
+            'year': 2000,
+            'genre': [genre['slug'] for genre in genres],
+            'category': 'films',
+        })
+        assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    def test_01_list_queries_do_not_grow_with_page(
+            self, admin_client, client, django_assert_max_num_queries):
+        _, _, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        with django_assert_max_num_queries(QUERY_BUDGET['list']):
+            response = client.get(url)
+        assert len(response.json()['results']) == 2
+
+        add_titles(admin_client, genres, 15)
+        with django_assert_max_num_queries(QUERY_BUDGET['list']):
+            response = client.get(url)
+        assert len(response.json()['results']) == 10, (
+            f'Проверьте, что GET-запрос к `{url}` выполняет постоянное '
+            'число SQL-запросов независимо от размера страницы.'
+        )
+
+    def test_02_detail_and_write_queries(self, admin_client, client,
+                                         django_assert_max_num_queries):
+        titles, _, genres = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        slugs = [genre['slug'] for genre in genres]
+
+        with django_assert_max_num_queries(QUERY_BUDGET['retrieve']):
+            response = client.get(f'{url}{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.OK
+
+        with django_assert_max_num_queries(QUERY_BUDGET['create']):
+            response = admin_client.post(url, data={
+                'name': 'Новое произведение', 'year': 2001,
+                'genre': slugs, 'category': 'books'
+            })
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['genre'] == slugs
+
+        with django_assert_max_num_queries(QUERY_BUDGET['partial_update']):
+            response = admin_client.patch(
+                f'{url}{titles[0]["id"]}/', data={'genre': slugs}
+            )
+        assert response.status_code == HTTPStatus.OK
+
+        with django_assert_max_num_queries(QUERY_BUDGET['destroy']):
+            response = admin_client.delete(f'{url}{titles[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_03_unknown_genre_slug(self, admin_client):
+        _, _, genres = create_titles(admin_client)
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Без жанра', 'year': 2001,
+            'genre': [genres[0]['slug'], 'unknown'], 'category': 'books'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Если POST-запрос к `/api/v1/titles/` содержит несуществующий '
+            'жанр - должен вернуться ответ со статусом 400.'
+        )
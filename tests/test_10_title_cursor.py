@@ -0,0 +1,95 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre, walk
+
+
+def create_named_titles(admin_client, names, category):
+    create_genre(admin_client)
+    ids = []
+    for name in names:
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': name, 'year': 2000, 'genre': ['drama'],
+            'category': category
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        ids.append((name, response.json()['id']))
+    return [title_id for _, title_id in sorted(ids)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleCursorPagination:
+
+    def test_01_cursor_walk_is_stable_with_duplicate_names(self, admin_client,
+                                                           client):
+        create_categories(admin_client)
+        names = ['Дубль'] * 12 + [f'Название {idx:02}' for idx in range(11)]
+        expected = create_named_titles(admin_client, names, 'films')
+        url = '/api/v1/titles/?cursor='
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        data = response.json()
+        assert 'count' not in data, (
+            f'Проверьте, что в режиме `{url}` ответ не содержит `count`.'
+        )
+        assert not any('COUNT(' in query['sql']
+                       for query in context.captured_queries), (
+            f'Проверьте, что в режиме `{url}` не выполняется COUNT(*).'
+        )
+
+        pages = walk(client, url)
+        assert [len(page) for page in pages] == [10, 10, 3]
+        assert sum(pages, []) == expected, (
+            f'Проверьте, что страницы `{url}` упорядочены по `(name, id)` '
+            'и не теряют и не повторяют произведения с одинаковым названием.'
+        )
+
+        last_page = client.get(url)
+        while last_page.json()['next']:
+            last_page = client.get(last_page.json()['next'])
+        previous = walk(client, last_page.json()['previous'], 'previous')
+        assert sum(reversed(previous), []) == expected[:20], (
+            f'Проверьте, что ссылка `previous` в режиме `{url}` возвращает '
+            'предыдущие страницы в том же порядке.'
+        )
+
+    def test_02_cursor_keeps_title_filters(self, admin_client, client):
+        create_categories(admin_client)
+        films = create_named_titles(
+            admin_client, [f'Фильм {idx}' for idx in range(12)], 'films'
+        )
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Фильм книга', 'year': 2000, 'genre': ['drama'],
+            'category': 'books'
+        })
+        pages = walk(client, '/api/v1/titles/?category=films&cursor=')
+        assert sum(pages, []) == films, (
+            'Проверьте, что режим `?cursor=` учитывает параметры фильтрации '
+            '`/api/v1/titles/`.'
+        )
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+        for url, position in (
+            ('/api/v1/titles/', [{'a': 1}, 'x']),
+            ('/api/v1/titles/', ['Фильм', None]),
+            ('/api/v1/titles/', ['x', 10 ** 30]),
+            ('/api/v1/titles/top/', [10 ** 400, 1]),
+            ('/api/v1/titles/top/', ['высокий', 1]),
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({'p': position}).encode()
+            ).decode()
+            response = client.get(url, {'cursor': cursor})
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что курсор `{position}` с значениями не того '
+                f'типа отклоняется `{url}` с кодом 404.'
+            )
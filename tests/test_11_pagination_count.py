@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+
+from api_yamdb.settings import PAGINATOR_COUNT_ESTIMATE_LIMIT
+from reviews.models import Title
+from tests.utils import create_genre, create_titles, get_with_queries
+
+
+def count_queries(client, url):
+    data, queries = get_with_queries(client, url)
+    return data, sum('COUNT(' in sql for sql in queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11PaginationCount:
+
+    def test_01_count_is_cached_until_write(self, admin_client, client):
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+
+        data, counts = count_queries(client, url)
+        assert (data['count'], counts) == (3, 1)
+        data, counts = count_queries(client, f'{url}?page=1')
+        assert (data['count'], counts) == (3, 0), (
+            f'Проверьте, что число объектов `{url}` берётся из кэша '
+            'для одинаковых параметров фильтрации.'
+        )
+        data, counts = count_queries(client, f'{url}?search=Драма')
+        assert (data['count'], counts) == (1, 1)
+
+        admin_client.post(url, data={'name': 'Вестерн', 'slug': 'western'})
+        data, counts = count_queries(client, url)
+        assert (data['count'], counts) == (4, 1), (
+            f'Проверьте, что кэш числа объектов `{url}` сбрасывается '
+            'при записи в таблицу.'
+        )
+
+    def test_02_title_count_follows_genre_links(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/?genre=drama'
+        data, _ = count_queries(client, url)
+        assert data['count'] == 1
+
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                           data={'genre': ['drama']})
+        data, _ = count_queries(client, url)
+        assert data['count'] == 2, (
+            'Проверьте, что изменение жанров произведения сбрасывает кэш '
+            'числа произведений.'
+        )
+
+    def test_03_estimated_and_uncounted_modes(self, admin_client, client):
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+
+        data, _ = count_queries(client, f'{url}?count=estimated')
+        assert data['count'] == 3
+        assert data['has_more'] is False
+
+        for idx in range(10):
+            admin_client.post(url, data={'name': f'Жанр {idx}',
+                                         'slug': f'genre-{idx}'})
+        data, counts = count_queries(client, f'{url}?count=none')
+        assert 'count' not in data, (
+            f'Проверьте, что в режиме `{url}?count=none` число объектов '
+            'не возвращается.'
+        )
+        assert counts == 1 and data['has_more'] is True
+        assert len(data['results']) == 10
+        data, _ = count_queries(client, f'{url}?count=none&page=2')
+        assert data['has_more'] is False and len(data['results']) == 3
+
+    def test_04_estimate_ignores_visible_filter(self, client):
+        total = PAGINATOR_COUNT_ESTIMATE_LIMIT + 500
+        Title.objects.bulk_create(
+            Title(name=f'Фильм {idx}', year=1990 + (idx < 10))
+            for idx in range(total)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        url = '/api/v1/titles/'
+        data, _ = count_queries(client, f'{url}?count=estimated')
+        assert data['count'] == total, (
+            f'Проверьте, что `{url}?count=estimated` без фильтров берёт '
+            'число строк из статистики таблицы.'
+        )
+        data, _ = count_queries(client, f'{url}?count=estimated&year=1990')
+        assert data['count'] == PAGINATOR_COUNT_ESTIMATE_LIMIT + 1
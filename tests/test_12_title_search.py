@@ -0,0 +1,56 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from tests.utils import create_titles
+
+
+def search(client, text):
+    response = client.get('/api/v1/titles/', {'search': text})
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitleSearch:
+
+    def test_01_search_ranks_name_above_description(self, admin_client,
+                                                    client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'description': 'Почти как терминатор'})
+
+        assert search(client, 'ТЕРМИНАТ') == ['Терминатор',
+                                              'Крепкий орешек'], (
+            'Проверьте, что `?search=` ищет по названию и описанию без учёта '
+            'регистра и выше ставит совпадения в названии.'
+        )
+        assert search(client, 'крепкий ореш') == ['Крепкий орешек']
+        assert search(client, '"*') == []
+
+    def test_02_index_follows_title_writes(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        admin_client.patch(url, data={'name': 'Робокоп'})
+        assert search(client, 'терминатор') == []
+        assert search(client, 'робокоп') == ['Робокоп'], (
+            'Проверьте, что полнотекстовый индекс обновляется при изменении '
+            'произведения.'
+        )
+        admin_client.delete(url)
+        assert search(client, 'робокоп') == []
+
+    def test_03_rebuild_search_index_command(self, admin_client, client):
+        create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM reviews_title_fts')
+        assert search(client, 'терминатор') == []
+
+        call_command('rebuild_search_index')
+        assert search(client, 'терминатор') == ['Терминатор'], (
+            'Проверьте, что команда `rebuild_search_index` заполняет '
+            'полнотекстовый индекс заново.'
+        )
@@ -0,0 +1,70 @@
+from http import HTTPStatus
+
+import pytest
+from django.test import RequestFactory
+
+from api.filters import TitleFilter
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+def filtered(client, query):
+    response = client.get(f'/api/v1/titles/?{query}')
+    assert response.status_code == HTTPStatus.OK
+    return sorted(title['name'] for title in response.json()['results'])
+
+
+def query_plan(query):
+    request = RequestFactory().get(f'/api/v1/titles/?{query}')
+    queryset = TitleFilter(request.GET, queryset=Title.objects.all(),
+                           request=request).qs
+    return queryset.explain()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13TitleGenreFilter:
+
+    def test_01_multi_value_genre_modes(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.patch(f'/api/v1/titles/{titles[1]["id"]}/',
+                           data={'genre': ['drama', 'comedy']})
+
+        assert filtered(client, 'genre=comedy,drama') == [
+            'Крепкий орешек', 'Терминатор'
+        ], (
+            'Проверьте, что `?genre=a,b` возвращает произведения хотя бы '
+            'с одним из жанров и без повторов.'
+        )
+        assert filtered(client, 'genre=comedy,drama&genre_mode=all') == [
+            'Крепкий орешек'
+        ], (
+            'Проверьте, что `?genre=a,b&genre_mode=all` возвращает '
+            'произведения со всеми перечисленными жанрами.'
+        )
+        assert filtered(client, 'genre=com') == [], (
+            'Проверьте, что `?genre=` сравнивает слаг целиком.'
+        )
+        assert filtered(client, 'genre=com*') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+        assert filtered(client, 'category=fil*,books') == [
+            'Крепкий орешек', 'Терминатор'
+        ]
+        response = client.get('/api/v1/titles/?genre=drama&genre_mode=some')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_filters_use_slug_indexes(self):
+        for query in ('genre=drama,comedy', 'genre=dra*',
+                      'genre=drama,comedy&genre_mode=all'):
+            plan = query_plan(query)
+            assert 'SCAN reviews_genres' not in plan and (
+                'reviews_genres_slug' in plan or 'sqlite_autoindex' in plan
+            ), (
+                f'Проверьте, что `?{query}` использует индекс по слагу '
+                f'жанра. План запроса:\n{plan}'
+            )
+        plan = query_plan('category=films,boo*')
+        assert 'SCAN reviews_categories' not in plan, (
+            'Проверьте, что `?category=` использует индекс по слагу '
+            f'категории. План запроса:\n{plan}'
+        )
@@ -0,0 +1,72 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from api.cache import get_or_compute
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ResponseCache:
+
+    def test_01_list_pages_are_cached_until_write(
+            self, admin_client, client, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        for url in ('/api/v1/titles/', '/api/v1/genres/',
+                    '/api/v1/categories/'):
+            first = client.get(f'{url}?page=1')
+            with django_assert_num_queries(0):
+                second = client.get(f'{url}?page=1')
+            assert second.json() == first.json(), (
+                f'Проверьте, что повторный GET-запрос к `{url}` отдаётся '
+                'из кэша без запросов к базе данных.'
+            )
+
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Вестерн', 'slug': 'western'})
+        response = client.get('/api/v1/genres/?page=1')
+        assert response.json()['count'] == 4, (
+            'Проверьте, что создание жанра сбрасывает кэш списка жанров.'
+        )
+
+        admin_client.patch(f'/api/v1/titles/{titles[0]["id"]}/',
+                           data={'genre': ['western']})
+        response = client.get('/api/v1/titles/?genre=western')
+        assert response.json()['count'] == 1
+
+    def test_02_review_refreshes_title_rating(self, admin_client,
+                                              user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/?name={titles[0]["name"]}'
+        assert client.get(url).json()['results'][0]['rating'] is None
+
+        create_single_review(user_client, titles[0]['id'], 'Отлично', 9)
+        response = client.get(url)
+        assert response.json()['results'][0]['rating'] == 9, (
+            'Проверьте, что новый отзыв сбрасывает кэш списка произведений.'
+        )
+
+    def test_03_single_flight(self):
+        key = 'test:single-flight'
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'computed'
+
+        cache.add(f'{key}:lock', 1)
+        threading.Timer(0.1, cache.set, (key, 'from-owner')).start()
+        assert get_or_compute(key, compute, wait=2) == 'from-owner'
+        assert calls == [], (
+            'Проверьте, что при занятой блокировке запрос ждёт значение '
+            'от владельца блокировки, а не обращается к базе данных.'
+        )
+
+        cache.delete(key)
+        assert get_or_compute(key, compute, wait=0.1) == 'computed'
+        cache.delete(f'{key}:lock')
+        cache.delete(key)
+        assert get_or_compute(key, compute) == 'computed'
+        assert cache.get(key) == 'computed' and len(calls) == 2
@@ -0,0 +1,101 @@
+from http import HTTPStatus
+
+import pytest
+from django.utils.http import http_date
+
+from reviews.models import Title
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalGet:
+
+    def test_01_titles_etag(self, admin_client, client,
+                            django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        for url in ('/api/v1/titles/', detail_url,
+                    '/api/v1/genres/', '/api/v1/categories/'):
+            response = client.get(url)
+            etag = response.get('ETag')
+            assert etag, (
+                f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+                'заголовок `ETag`.'
+            )
+            assert not response.has_header('Last-Modified'), (
+                f'Проверьте, что `{url}` не отдаёт `Last-Modified`: '
+                'он не учитывает вложенные объекты.'
+            )
+            with django_assert_max_num_queries(1):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что GET-запрос к `{url}` с актуальным '
+                '`If-None-Match` возвращает ответ со статусом 304.'
+            )
+            assert response.get('ETag') == etag
+
+        url = '/api/v1/titles/'
+        etag = client.get(url)['ETag']
+        admin_client.delete('/api/v1/genres/comedy/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление жанра меняет `ETag` списка произведений.'
+        )
+
+        etag = client.get(detail_url)['ETag']
+        genre = Title.objects.get(pk=titles[0]['id']).genre.first()
+        genre.name = 'Новое название'
+        genre.save()
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что переименование жанра меняет `ETag` '
+            'произведения.'
+        )
+
+    def test_02_reviews_etag(self, admin_client, admin, user, user_client):
+        reviews, titles = create_reviews(admin_client, {admin: admin_client})
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        detail_url = f'{url}{reviews[0]["id"]}/'
+
+        response = user_client.get(detail_url)
+        assert not response.has_header('Last-Modified')
+        etag = response['ETag']
+        response = user_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что GET-запрос к отзыву с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        admin.username = 'renamed'
+        admin.save()
+        response = user_client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что смена имени автора меняет `ETag` отзыва.'
+        )
+        assert response.json()['author'] == 'renamed'
+
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/?expand=latest_reviews'
+        etag = user_client.get(title_url)['ETag']
+        admin_client.patch(detail_url, data={'text': 'Новый текст'})
+        response = user_client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что правка отзыва меняет `ETag` произведения '
+            'с `?expand=latest_reviews`.'
+        )
+        assert response.json()['latest_reviews'][0]['text'] == 'Новый текст'
+
+        etag = user_client.get(url)['ETag']
+        user_client.post(url, data={'text': 'Ещё отзыв', 'score': 3})
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет `ETag` списка отзывов.'
+        )
+        assert len(response.json()['results']) == 2
+
+        since = http_date()
+        admin_client.delete(detail_url)
+        response = user_client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после удаления отзыва `If-Modified-Since` '
+            'не приводит к ответу 304 для списка отзывов.'
+        )
+        assert len(response.json()['results']) == 1
@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+def get_with_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), [query['sql'] for query in
+                             context.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SparseFields:
+
+    def test_01_title_fields_prune_queries(self, admin_client, client):
+        create_titles(admin_client)
+        url = '/api/v1/titles/?fields=id,name'
+
+        data, queries = get_with_queries(client, url)
+        assert all(set(title) == {'id', 'name'}
+                   for title in data['results']), (
+            f'Проверьте, что `{url}` возвращает только запрошенные поля.'
+        )
+        assert not any('reviews_genres' in sql or 'reviews_categories' in sql
+                       for sql in queries), (
+            f'Проверьте, что `{url}` не загружает жанры и категории.'
+        )
+        assert not any('"reviews_title"."description"' in sql
+                       for sql in queries), (
+            f'Проверьте, что `{url}` не выбирает столбец описания.'
+        )
+
+        data, queries = get_with_queries(
+            client, '/api/v1/titles/?omit=genre,description,rating'
+        )
+        assert set(data['results'][0]) == {'id', 'name', 'year', 'category'}
+        assert not any('reviews_genres' in sql for sql in queries)
+        assert any('reviews_categories' in sql for sql in queries)
+
+    def test_02_review_and_comment_fields(self, admin_client, admin, user,
+                                          user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, _ = get_with_queries(user_client, f'{url}?fields=id,score')
+        assert data['results'][0] == {'id': reviews[0]['id'], 'score': 5}
+
+        data, _ = get_with_queries(
+            user_client, f'{url}{reviews[0]["id"]}/comments/?omit=review'
+        )
+        assert 'review' not in data['results'][0]
+        assert data['results'][0]['text'] == comments[0]['text']
+
+        response = user_client.patch(f'{url}{reviews[1]["id"]}/?fields=id',
+                                     data={'score': 7})
+        assert response.json()['score'] == 7, (
+            'Проверьте, что `?fields=` не влияет на запросы на изменение.'
+        )
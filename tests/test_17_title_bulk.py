@@ -0,0 +1,103 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Title
+from tests.utils import create_titles
+
+URL = '/api/v1/titles/bulk/'
+
+
+def make_items(count, genres=('drama', 'comedy'), category='films'):
+    return [{'name': f'Пакет {idx}', 'year': 2000 + idx % 20,
+             'genre': list(genres), 'category': category}
+            for idx in range(count)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleBulk:
+
+    def test_01_bulk_create_and_update(self, admin_client, client,
+                                       django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        items = make_items(50)
+        items.append({'id': titles[0]['id'], 'name': 'Терминатор 2',
+                      'genre': ['drama']})
+
+        with django_assert_max_num_queries(15):
+            response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос администратора к `{URL}` с '
+            'корректными данными возвращает ответ со статусом 200.'
+        )
+        results = response.json()['results']
+        assert [item['status'] for item in results] == (
+            ['created'] * 50 + ['updated']
+        )
+        assert Title.objects.count() == 52
+        created = Title.objects.get(pk=results[0]['id'])
+        assert sorted(created.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['name'] == 'Терминатор 2'
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'drama'
+        ]
+        response = client.get('/api/v1/titles/', {'search': 'пакет 49'})
+        assert response.json()['count'] == 1, (
+            'Проверьте, что пакетная загрузка обновляет поисковый индекс '
+            'и сбрасывает кэш списка произведений.'
+        )
+
+    def test_02_partial_failure_modes(self, admin_client, user_client):
+        create_titles(admin_client)
+        items = make_items(3)
+        items[1]['genre'] = ['unknown']
+        items.append({'id': 999999, 'name': 'Нет такого'})
+
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        statuses = [item['status'] for item in response.json()['results']]
+        assert statuses == ['skipped', 'error', 'skipped', 'error'], (
+            f'Проверьте, что по умолчанию `{URL}` не сохраняет пакет с '
+            'ошибками и сообщает результат по каждому элементу.'
+        )
+        assert Title.objects.count() == 2
+
+        response = admin_client.post(f'{URL}?on_error=skip', data=items,
+                                     format='json')
+        assert response.status_code == HTTPStatus.OK
+        statuses = [item['status'] for item in response.json()['results']]
+        assert statuses == ['created', 'error', 'created', 'error']
+        assert Title.objects.count() == 4
+
+        response = user_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_ids_are_not_reused(self, admin_client, monkeypatch):
+        create_titles(admin_client)
+        response = admin_client.post(URL, data=make_items(3), format='json')
+        last_id = response.json()['results'][-1]['id']
+        Title.objects.filter(pk=last_id).delete()
+        response = admin_client.post(URL, data=make_items(2), format='json')
+        assert response.status_code == HTTPStatus.OK
+        ids = [item['id'] for item in response.json()['results']]
+        assert min(ids) > last_id, (
+            f'Проверьте, что `{URL}` не выдаёт повторно ключи удалённых '
+            'произведений.'
+        )
+
+        # Ключ, который заняла параллельная вставка.
+        monkeypatch.setattr('api.bulk.allocate_ids',
+                            lambda model, count, using: [ids[0]] * count)
+        response = admin_client.post(URL, data=make_items(2), format='json')
+        assert response.status_code == HTTPStatus.CONFLICT, (
+            f'Проверьте, что конфликт ключей при записи `{URL}` возвращает '
+            'ответ со статусом 409.'
+        )
+        assert [item['status'] for item in response.json()['results']] == [
+            'error', 'error'
+        ]
+        assert Title.objects.count() == 6
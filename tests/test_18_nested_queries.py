@@ -0,0 +1,96 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+# Аутентификация, родитель из URL, а дальше только запросы самого действия.
+REVIEW_BUDGET = {
+    'list': 5,
+    'retrieve': 4,
+    'create': 5,
+    'partial_update': 6,
+    'destroy': 7,
+}
+COMMENT_BUDGET = {
+    'list': 5,
+    'retrieve': 4,
+    'create': 3,
+    'partial_update': 4,
+    'destroy': 4,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18NestedQueries:
+
+    def test_01_review_query_budget(self, admin_client, admin, user,
+                                    user_client,
+                                    django_assert_max_num_queries):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        detail_url = f'{url}{reviews[0]["id"]}/'
+        requests = {
+            'list': lambda: user_client.get(url),
+            'retrieve': lambda: user_client.get(detail_url),
+            'create': lambda: admin_client.post(
+                f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+                data={'text': 'Новый отзыв', 'score': 4}
+            ),
+            'partial_update': lambda: admin_client.patch(
+                detail_url, data={'score': 3}
+            ),
+            'destroy': lambda: admin_client.delete(detail_url),
+        }
+        for action, request in requests.items():
+            with django_assert_max_num_queries(REVIEW_BUDGET[action]):
+                response = request()
+            assert response.status_code < HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что действие `{action}` для отзывов '
+                'выполняется успешно.'
+            )
+
+    def test_02_comment_query_budget(self, admin_client, admin, user,
+                                     user_client,
+                                     django_assert_max_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        detail_url = f'{url}{comments[0]["id"]}/'
+        requests = {
+            'list': lambda: user_client.get(url),
+            'retrieve': lambda: user_client.get(detail_url),
+            'create': lambda: user_client.post(
+                url, data={'text': 'Новый комментарий'}
+            ),
+            'partial_update': lambda: admin_client.patch(
+                detail_url, data={'text': 'Исправлено'}
+            ),
+            'destroy': lambda: admin_client.delete(detail_url),
+        }
+        for action, request in requests.items():
+            with django_assert_max_num_queries(COMMENT_BUDGET[action]):
+                response = request()
+            assert response.status_code < HTTPStatus.BAD_REQUEST, (
+                f'Проверьте, что действие `{action}` для комментариев '
+                'выполняется успешно.'
+            )
+
+    def test_03_comment_requires_matching_title(self, admin_client, admin,
+                                                user, user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        for response in (user_client.get(url),
+                         user_client.get(f'{url}{comments[0]["id"]}/'),
+                         user_client.post(url, data={'text': 'Мимо'})):
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что комментарии отзыва недоступны по адресу '
+                'с чужим `title_id`.'
+            )
@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Review
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ReviewUpsert:
+
+    def test_01_duplicate_review_uses_constraint(self, admin_client,
+                                                 user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            create_single_review(user_client, titles[0]['id'], 'Первый', 5)
+        assert not any('SELECT (1) AS "a"' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что перед созданием отзыва не выполняется '
+            'отдельная проверка exists().'
+        )
+
+        response = user_client.post(url, data={'text': 'Второй', 'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f'Проверьте, что повторный POST-запрос к `{url}` возвращает '
+            'ответ со статусом 400.'
+        )
+        assert 'non_field_errors' in response.json()
+        assert Review.objects.count() == 1
+        response = user_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 5
+
+    def test_02_put_mine_creates_or_replaces(self, admin_client, user,
+                                             user_client, client,
+                                             django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/mine/'
+        create_single_review(admin_client, titles[0]['id'], 'Админ', 10)
+
+        response = user_client.put(url, data={'text': 'Неплохо', 'score': 6})
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что первый PUT-запрос к `{url}` создаёт отзыв и '
+            'возвращает ответ со статусом 201.'
+        )
+        review_id = response.json()['id']
+        assert response.json()['author'] == user.username
+
+        with django_assert_max_num_queries(6):
+            response = user_client.put(url, data={'text': 'Хорошо',
+                                                  'score': 8})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что повторный PUT-запрос к `{url}` заменяет отзыв '
+            'и возвращает ответ со статусом 200.'
+        )
+        assert response.json()['id'] == review_id
+        assert response.json()['text'] == 'Хорошо'
+        assert Review.objects.get(pk=review_id).score == 8
+        assert Review.objects.filter(author=user).count() == 1
+
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 9, (
+            'Проверьте, что замена отзыва пересчитывает рейтинг '
+            'произведения.'
+        )
+
+        response = user_client.put(url, data={'score': 8})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.put(url, data={'text': 'Аноним', 'score': 1})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
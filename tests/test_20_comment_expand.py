@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import (create_comments, create_single_comment,
+                         get_with_queries)
+
+
+def count_queries(client, url):
+    return len(get_with_queries(client, url)[1])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20CommentExpand:
+
+    def test_01_review_reference(self, admin_client, admin, user,
+                                 user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        comment = user_client.get(url).json()['results'][0]
+        assert comment['review'] == reviews[0]['id'], (
+            f'Проверьте, что GET-запрос к `{url}` возвращает в поле '
+            '`review` идентификатор отзыва, а не его текст.'
+        )
+
+        response = user_client.get(f'{url}?expand=review')
+        review = response.json()['results'][0]['review']
+        assert review == {
+            'id': reviews[0]['id'],
+            'text': reviews[0]['text'],
+            'author': reviews[0]['author'],
+            'score': reviews[0]['score'],
+            'pub_date': review['pub_date'],
+        }, (
+            f'Проверьте, что `{url}?expand=review` вкладывает в поле '
+            '`review` данные отзыва.'
+        )
+        response = user_client.get(
+            f'{url}{comments[0]["id"]}/?expand=review'
+        )
+        assert response.json()['review']['id'] == reviews[0]['id']
+
+    def test_02_constant_queries(self, admin_client, admin, user,
+                                 user_client, moderator, moderator_client):
+        clients = {admin: admin_client, user: user_client,
+                   moderator: moderator_client}
+        _, reviews, titles = create_comments(admin_client, clients)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        few = count_queries(user_client, url)
+        few_expanded = count_queries(user_client, f'{url}?expand=review')
+        for idx, client in enumerate(clients.values()):
+            for number in range(3):
+                create_single_comment(client, titles[0]['id'],
+                                      reviews[0]['id'], f'ещё {idx}{number}')
+        assert count_queries(user_client, url) == few, (
+            'Проверьте, что число запросов к БД для страницы комментариев '
+            'не зависит от числа комментариев.'
+        )
+        assert count_queries(user_client, f'{url}?expand=review') == (
+            few_expanded
+        )
+        assert few_expanded == few
+
+    def test_03_expanded_etag_follows_review(self, admin_client, admin,
+                                             user, user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        review_url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                      f'{reviews[0]["id"]}/')
+        url = f'{review_url}comments/?expand=review'
+        etag = user_client.get(url)['ETag']
+        admin_client.patch(review_url, data={'text': 'Новый текст'})
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение отзыва меняет `ETag` списка '
+            'комментариев с `?expand=review`.'
+        )
+        assert response.json()['results'][0]['review']['text'] == (
+            'Новый текст'
+        )
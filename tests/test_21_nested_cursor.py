@@ -0,0 +1,126 @@
+import base64
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+from tests.utils import create_many_reviews, create_titles, walk
+
+
+def create_reviews_with_ties(title, count):
+    reviews = create_many_reviews(title.pk, count)
+    # Половина отзывов с одинаковой датой: порядок держится на `id`.
+    Review.objects.filter(pk__in=[review.pk for review in reviews[::2]]
+                          ).update(pub_date=reviews[0].pub_date)
+    return list(Review.objects.filter(title=title).order_by('pub_date', 'id')
+                .values_list('id', flat=True))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21NestedCursorPagination:
+
+    def test_01_reviews_cursor_walk(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        expected = create_reviews_with_ties(title, 25)
+        url = f'/api/v1/titles/{title.pk}/reviews/?cursor='
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert 'count' not in response.json()
+        assert not any('COUNT(' in query['sql'] or 'MAX(' in query['sql']
+                       for query in context.captured_queries), (
+            f'Проверьте, что `{url}` не выполняет агрегатов по всем '
+            'отзывам произведения.'
+        )
+
+        pages = walk(client, url)
+        assert [pk for page in pages for pk in page] == expected, (
+            f'Проверьте, что обход `{url}` по курсору возвращает все отзывы '
+            'в порядке (pub_date, id) без повторов и пропусков.'
+        )
+        last = client.get(url)
+        while last.json()['next']:
+            last = client.get(last.json()['next'])
+        back = walk(client, last.json()['previous'], 'previous')
+        assert [pk for page in reversed(back) for pk in page] == (
+            expected[:-len(last.json()['results'])]
+        )
+
+        pages = walk(client, f'{url}&ordering=-pub_date')
+        assert [pk for page in pages for pk in page] == expected[::-1], (
+            'Проверьте, что `?ordering=-pub_date` обходит отзывы от новых '
+            'к старым.'
+        )
+
+    def test_02_walk_is_stable_during_inserts(self, admin_client, admin,
+                                              client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        expected = create_reviews_with_ties(title, 15)
+        review = Review.objects.get(pk=expected[0])
+        comments = [Comment.objects.create(review=review, author=admin,
+                                           text=f'Комментарий {idx}').pk
+                    for idx in range(15)]
+        inserted = []
+
+        def insert_comment():
+            inserted.append(Comment.objects.create(
+                review=review, author=admin, text='Новый'
+            ).pk)
+
+        url = (f'/api/v1/titles/{title.pk}/reviews/{review.pk}/'
+               'comments/?cursor=')
+        pages = walk(client, url, on_page=insert_comment)
+        seen = [pk for page in pages for pk in page]
+        assert len(seen) == len(set(seen)), (
+            f'Проверьте, что обход `{url}` не повторяет комментарии, '
+            'добавленные во время обхода.'
+        )
+        assert seen[:len(comments)] == comments
+        assert set(seen[len(comments):]) <= set(inserted)
+
+        response = client.get(
+            f'/api/v1/titles/{title.pk}/reviews/{review.pk}/comments/'
+            '?cursor=broken'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'p': ['вчера', review.pk]}).encode()
+        ).decode()
+        response = client.get(f'/api/v1/titles/{title.pk}/reviews/',
+                              {'cursor': cursor})
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что курсор с некорректной датой отклоняется '
+            'с кодом 404.'
+        )
+
+    def test_03_cursor_etag_changes_on_delete(self, admin_client, admin,
+                                              user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        reviews = [Review.objects.create(title=title, author=author,
+                                         text='Отзыв', score=5)
+                   for author in (admin, user)]
+        comments = [Comment.objects.create(review=reviews[0], author=admin,
+                                           text=f'Ответ {idx}')
+                    for idx in range(2)]
+        urls = {
+            f'/api/v1/titles/{title.pk}/reviews/?cursor=': reviews[0],
+            f'/api/v1/titles/{title.pk}/reviews/{reviews[0].pk}/comments/'
+            '?cursor=': comments[0],
+        }
+        for url, obj in reversed(list(urls.items())):
+            etag = user_client.get(url)['ETag']
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'Проверьте, что `{url}` без изменений отвечает 304.'
+            )
+            obj.delete()
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что удаление объекта меняет `ETag` `{url}`.'
+            )
@@ -0,0 +1,40 @@
+import pytest
+
+from reviews.models import Comment, Review
+
+
+def assert_index_plan(queryset, index):
+    plan = queryset.explain()
+    assert index in plan and 'TEMP B-TREE' not in plan, (
+        f'Проверьте, что запрос использует индекс `{index}` и не '
+        f'сортирует строки отдельно. План запроса:\n{plan}'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22NestedIndexes:
+
+    def test_01_nested_lists_use_composite_indexes(self):
+        assert_index_plan(
+            Review.objects.filter(title_id=1).order_by('pub_date', 'id'),
+            'review_title_pub_date_idx'
+        )
+        assert_index_plan(
+            Review.objects.filter(title_id=1, pub_date__gte='2020-01-01')
+            .order_by('-pub_date', '-id'),
+            'review_title_pub_date_idx'
+        )
+        assert_index_plan(
+            Comment.objects.filter(review_id=1).order_by('pub_date', 'id'),
+            'comment_review_pub_date_idx'
+        )
+
+    def test_02_author_lists_use_composite_indexes(self):
+        assert_index_plan(
+            Review.objects.filter(author_id=1).order_by('-pub_date'),
+            'review_author_pub_date_idx'
+        )
+        assert_index_plan(
+            Comment.objects.filter(author_id=1).order_by('-pub_date'),
+            'comment_author_pub_date_idx'
+        )
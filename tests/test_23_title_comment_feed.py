@@ -0,0 +1,77 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment
+from tests.utils import create_comments, create_single_comment
+
+
+def get_feed(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TitleCommentFeed:
+
+    def test_01_feed_spans_reviews(self, admin_client, admin, user,
+                                   user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        create_single_comment(admin_client, titles[0]['id'],
+                              reviews[1]['id'], 'Ко второму отзыву')
+        url = f'/api/v1/titles/{titles[0]["id"]}/comments/'
+        data, _ = get_feed(user_client, url)
+        assert [comment['review'] for comment in data['results']] == [
+            reviews[0]['id'], reviews[0]['id'], reviews[1]['id']
+        ], (
+            f'Проверьте, что `{url}` возвращает комментарии ко всем отзывам '
+            'произведения в порядке публикации.'
+        )
+        assert data['results'][0]['author'] == comments[0]['author']
+        assert set(data) == {'next', 'previous', 'results'}
+
+        response = user_client.get(f'/api/v1/titles/{titles[1]["id"]}/'
+                                   'comments/')
+        assert response.json()['results'] == []
+        response = user_client.get('/api/v1/titles/999/comments/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = user_client.post(url, data={'text': 'Нельзя'})
+        assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+
+    def test_02_constant_queries_and_cursor(self, admin_client, admin, user,
+                                            user_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/comments/'
+        _, few = get_feed(user_client, url)
+        _, few_expanded = get_feed(user_client, f'{url}?expand=review')
+        for review in reviews:
+            for number in range(12):
+                Comment.objects.create(review_id=review['id'], author=admin,
+                                       text=f'Ещё {number}')
+        data, many = get_feed(user_client, url)
+        assert many == few, (
+            f'Проверьте, что число запросов к БД для `{url}` не зависит от '
+            'числа комментариев.'
+        )
+        expanded, many_expanded = get_feed(user_client,
+                                           f'{url}?expand=review')
+        assert many_expanded == few_expanded == few
+        assert expanded['results'][0]['review']['id'] == reviews[0]['id']
+
+        seen = []
+        while url:
+            data, _ = get_feed(user_client, url)
+            seen.extend(comment['id'] for comment in data['results'])
+            url = data['next']
+        assert len(seen) == len(set(seen)) == Comment.objects.count(), (
+            'Проверьте, что обход ленты комментариев по курсору возвращает '
+            'каждый комментарий ровно один раз.'
+        )
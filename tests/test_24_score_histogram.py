@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from reviews.models import Title
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+def histogram(client, title_id):
+    response = client.get(f'/api/v1/titles/{title_id}/rating-histogram/')
+    assert response.status_code == HTTPStatus.OK
+    return response.json()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24ScoreHistogram:
+
+    def test_01_histogram_follows_review_writes(self, admin_client,
+                                                user_client,
+                                                moderator_client, client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+        create_single_review(admin_client, title_id, 'Отлично', 10)
+        review = create_single_review(user_client, title_id, 'Хорошо',
+                                      8).json()
+        create_single_review(moderator_client, title_id, 'Тоже хорошо', 8)
+
+        data = histogram(client, title_id)
+        assert data['review_count'] == 3
+        assert data['histogram'] == {
+            str(score): {8: 2, 10: 1}.get(score, 0)
+            for score in range(1, 11)
+        }, (
+            'Проверьте, что `/api/v1/titles/{title_id}/rating-histogram/` '
+            'возвращает число отзывов с каждой оценкой.'
+        )
+
+        user_client.patch(f'{url}{review["id"]}/', data={'score': 3})
+        moderator_client.put(f'{url}mine/', data={'text': 'Хуже', 'score': 5})
+        admin_client.delete(f'{url}{review["id"]}/')
+        data = histogram(client, title_id)
+        assert data['review_count'] == 2
+        assert {score: count for score, count in data['histogram'].items()
+                if count} == {'5': 1, '10': 1}, (
+            'Проверьте, что изменение и удаление отзыва обновляют '
+            'гистограмму оценок.'
+        )
+        response = client.get('/api/v1/titles/999/rating-histogram/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_title_detail_opt_in(self, admin_client, user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Неплохо', 7)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert 'rating_histogram' not in client.get(url).json(), (
+            'Проверьте, что гистограмма оценок выводится только по запросу.'
+        )
+        response = client.get(f'{url}?expand=rating_histogram')
+        assert response.json()['rating_histogram']['7'] == 1
+        response = client.get('/api/v1/titles/?expand=rating_histogram')
+        assert all('rating_histogram' in title
+                   for title in response.json()['results'])
+
+    def test_03_check_and_rebuild(self, admin_client, admin, user,
+                                  user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        call_command('rebuild_ratings', '--check')
+
+        Title.objects.filter(pk=titles[0]['id']).update(score_5_count=0,
+                                                        score_sum=1)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        call_command('rebuild_ratings', '--check')
+        assert Title.objects.get(pk=titles[0]['id']).score_5_count == len(
+            reviews
+        ), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает '
+            'гистограмму оценок.'
+        )
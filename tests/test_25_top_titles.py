@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.utils import (create_many_reviews, create_single_review,
+                         create_titles)
+
+URL = '/api/v1/titles/top/'
+
+
+def top_names(client, query=''):
+    response = client.get(f'{URL}?{query}')
+    assert response.status_code == HTTPStatus.OK
+    return [title['name'] for title in response.json()['results']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TopTitles:
+
+    def test_01_weighted_ranking(self, admin_client, user_client, client):
+        titles, _, _ = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Без отзывов', 'year': 2000, 'genre': ['drama'],
+            'category': 'films'
+        })
+        create_single_review(user_client, titles[0]['id'], 'Шедевр', 10)
+        create_many_reviews(titles[1]['id'], [9] * 30, 'fan')
+
+        assert top_names(client) == ['Крепкий орешек', 'Терминатор'], (
+            f'Проверьте, что `{URL}` ставит произведение с многими '
+            'высокими оценками выше произведения с одной оценкой 10 и не '
+            'включает произведения без отзывов.'
+        )
+        assert top_names(client, 'category=films') == ['Терминатор']
+        assert top_names(client, 'genre=drama') == ['Крепкий орешек']
+        assert top_names(client, 'year=1984') == ['Терминатор']
+
+        create_many_reviews(titles[0]['id'], [10] * 60, 'critic')
+        assert top_names(client) == ['Терминатор', 'Крепкий орешек'], (
+            'Проверьте, что новые отзывы сразу пересчитывают взвешенный '
+            'рейтинг произведения.'
+        )
+
+    def test_02_top_reads_rank_index(self):
+        plan = Title.objects.filter(rank_score__isnull=False).order_by(
+            '-rank_score', 'id'
+        ).explain()
+        assert 'title_rank_idx' in plan and 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что `{URL}` читает произведения по индексу '
+            f'взвешенного рейтинга. План запроса:\n{plan}'
+        )
+        plan = Title.objects.filter(category_id=1).order_by(
+            '-rank_score', 'id'
+        ).explain()
+        assert 'title_category_rank_idx' in plan, plan
+
+    def test_03_batch_recompute(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Хорошо', 8)
+        expected = Title.objects.get(pk=titles[0]['id']).rank_score
+        assert expected == pytest.approx((8 + 5.5 * 10) / 11)
+
+        Title.objects.update(rank_score=None)
+        call_command('rebuild_ratings', '--ranks')
+        assert Title.objects.get(pk=titles[0]['id']).rank_score == (
+            pytest.approx(expected)
+        ), (
+            'Проверьте, что `rebuild_ratings --ranks` пересчитывает '
+            'взвешенный рейтинг.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rank_score is None
+        call_command('rebuild_ratings', '--check')
@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Title
+from tests.utils import create_many_reviews, create_titles, get_with_queries
+
+URL = '/api/v1/titles/?expand=latest_reviews'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26LatestReviews:
+
+    def test_01_latest_reviews_per_title(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        first = Title.objects.get(pk=titles[0]['id'])
+        second = Title.objects.get(pk=titles[1]['id'])
+        first_ids = [review.pk
+                     for review in create_many_reviews(first.pk, 5, 'first')]
+        second_ids = [review.pk for review in
+                      create_many_reviews(second.pk, 2, 'second')]
+
+        data, queries = get_with_queries(client, URL)
+        latest = {title['id']: [review['id']
+                                for review in title['latest_reviews']]
+                  for title in data['results']}
+        assert latest == {first.pk: first_ids[:-4:-1],
+                          second.pk: second_ids[::-1]}, (
+            f'Проверьте, что `{URL}` вкладывает в каждое произведение три '
+            'его новейших отзыва.'
+        )
+        review = data['results'][0]['latest_reviews'][0]
+        assert set(review) == {'id', 'text', 'author', 'score', 'pub_date'}
+        assert sum('ROW_NUMBER() OVER' in sql for sql in queries) == 1, (
+            f'Проверьте, что `{URL}` получает отзывы всех произведений '
+            'страницы одним запросом с оконной функцией.'
+        )
+
+        data, _ = get_with_queries(client, f'{URL}&latest_reviews_limit=1')
+        assert [len(title['latest_reviews'])
+                for title in data['results']] == [1, 1]
+        data, _ = get_with_queries(client, f'/api/v1/titles/{first.pk}/'
+                                 '?expand=latest_reviews')
+        assert [review['id'] for review in data['latest_reviews']] == (
+            first_ids[:-4:-1]
+        )
+        data, _ = get_with_queries(client, '/api/v1/titles/')
+        assert 'latest_reviews' not in data['results'][0]
+        response = client.get(f'{URL}&latest_reviews_limit=100')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_constant_queries(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        for title in titles:
+            create_many_reviews(title['id'], 2, f'reader{title["id"]}_')
+        _, few = get_with_queries(client, URL)
+        for idx in range(6):
+            title = Title.objects.create(name=f'Ещё {idx}', year=2000)
+            create_many_reviews(title.pk, 4, f'more{idx}_')
+        data, many = get_with_queries(client, URL)
+        assert len(data['results']) == 8
+        assert len(many) == len(few), (
+            f'Проверьте, что число запросов к БД для `{URL}` не зависит '
+            'от числа произведений на странице.'
+        )
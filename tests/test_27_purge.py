@@ -0,0 +1,179 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+from tests.utils import (create_comments, create_many_reviews,
+                         create_single_review, create_titles)
+
+
+def delete_queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.delete(url)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Purge:
+
+    def test_01_title_delete_is_set_based(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        create_many_reviews(titles[0]['id'], [7] * 2, 'few', comment=True)
+        create_many_reviews(titles[1]['id'], [7] * 30, 'many', comment=True)
+
+        few = delete_queries(admin_client,
+                             f'/api/v1/titles/{titles[0]["id"]}/')
+        many = delete_queries(admin_client,
+                              f'/api/v1/titles/{titles[1]["id"]}/')
+        assert many == few, (
+            'Проверьте, что удаление произведения выполняет одинаковое '
+            'число запросов независимо от числа отзывов.'
+        )
+        assert not Title.objects.exists()
+        assert not Review.objects.exists() and not Comment.objects.exists()
+
+    def test_02_large_title_is_purged_in_background(self, admin_client,
+                                                    client, monkeypatch):
+        monkeypatch.setattr('api.views.PURGE_INLINE_LIMIT', 5)
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_many_reviews(title_id, [7] * 6, 'reader', comment=True)
+        url = f'/api/v1/titles/{title_id}/'
+
+        response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert Review.objects.filter(title_id=title_id).count() == 6, (
+            'Проверьте, что большое произведение удаляется фоновой '
+            'очисткой, а не в запросе.'
+        )
+        for hidden in (url, f'{url}reviews/', f'{url}comments/'):
+            assert client.get(hidden).status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что `{hidden}` недоступен, пока произведение '
+                'ожидает фоновой очистки.'
+            )
+        assert [title['id'] for title in
+                client.get('/api/v1/titles/').json()['results']] == [
+            titles[1]['id']
+        ]
+
+        call_command('purge_deleted', '--batch-size', '2')
+        assert not Title.objects.filter(pk=title_id).exists()
+        assert not Review.objects.filter(title_id=title_id).exists()
+        assert Comment.objects.count() == 0
+
+    def test_03_user_delete_retracts_scores(self, admin_client, admin, user,
+                                            user_client, moderator,
+                                            moderator_client, client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client,
+                           moderator: moderator_client}
+        )
+        create_single_review(user_client, titles[1]['id'], 'Плохо', 1)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        assert not Review.objects.filter(author_id=user.pk).exists()
+        assert not Comment.objects.filter(author_id=user.pk).exists()
+        for title in titles:
+            data = client.get(f'/api/v1/titles/{title["id"]}/'
+                              '?expand=rating_histogram').json()
+            assert data['rating'] == (5 if title is titles[0] else None), (
+                'Проверьте, что удаление пользователя снимает его оценки '
+                'с рейтинга произведений.'
+            )
+        call_command('rebuild_ratings', '--check')
+
+    def test_04_large_user_is_hidden_until_purged(self, admin_client, admin,
+                                                  user, user_client, client,
+                                                  settings):
+        settings.PURGE_INLINE_LIMIT = 0
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(user_client, title_id, 'Хорошо',
+                                      8).json()
+        Comment.objects.create(review_id=review['id'], author_id=user.pk,
+                               text='Ответ')
+        admin_review = Review.objects.create(title_id=title_id, author=admin,
+                                             text='Отзыв', score=4)
+        Comment.objects.create(review=admin_review, author_id=user.pk,
+                               text='Ответ')
+        url = f'/api/v1/users/{user.username}/'
+
+        assert admin_client.delete(url).status_code == (
+            HTTPStatus.NO_CONTENT
+        )
+        assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что пользователь, ожидающий фоновой очистки, '
+            'не проходит аутентификацию.'
+        )
+        assert Review.objects.filter(author_id=user.pk).exists()
+
+        title_url = f'/api/v1/titles/{title_id}/'
+        assert client.get(title_url).json()['rating'] == 4, (
+            'Проверьте, что оценки пользователя, ожидающего фоновой '
+            'очистки, сразу снимаются с рейтинга.'
+        )
+        call_command('rebuild_ratings', '--check')
+        for hidden, count in (
+            (f'{title_url}reviews/', 1),
+            (f'{title_url}reviews/{admin_review.pk}/comments/', 0),
+            (f'{title_url}comments/', 0),
+            (f'{title_url}?expand=latest_reviews', None),
+        ):
+            data = client.get(hidden).json()
+            results = data.get('results', data.get('latest_reviews'))
+            assert all(item['author'] != user.username
+                       for item in results) and (
+                count is None or len(results) == count
+            ), (
+                f'Проверьте, что `{hidden}` не показывает отзывы '
+                'и комментарии пользователя, ожидающего фоновой очистки.'
+            )
+        response = client.get(f'{title_url}reviews/{review["id"]}/comments/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+        call_command('purge_deleted')
+        assert not Review.objects.filter(author_id=user.pk).exists()
+        assert Title.objects.get(pk=title_id).rating == 4
+        call_command('rebuild_ratings', '--check')
+
+    def test_05_visible_lists_keep_sort_indexes(self):
+        plan = Title.objects.visible().order_by(
+            '-rank_score', 'id'
+        )[:10].explain()
+        assert 'title_rank_idx' in plan and 'TEMP B-TREE' not in plan, (
+            'Проверьте, что фильтр `deleted_at IS NULL` не мешает спискам '
+            f'использовать индексы сортировки. План запроса:\n{plan}'
+        )
+        plan = Review.objects.visible().filter(title_id=1).order_by(
+            'pub_date', 'id'
+        )[:10].explain()
+        assert ('review_title_pub_date_idx' in plan
+                and 'TEMP B-TREE' not in plan), (
+            'Проверьте, что скрытие отзывов удалённых пользователей не '
+            f'мешает сортировке по индексу. План запроса:\n{plan}'
+        )
+
+    def test_06_discussed_reviews_count_for_user_delete(
+        self, admin_client, user, user_client, settings
+    ):
+        settings.PURGE_INLINE_LIMIT = 5
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(user_client, titles[0]['id'], 'Спорно',
+                                      5).json()
+        for other in create_many_reviews(titles[1]['id'], [7] * 6):
+            Comment.objects.create(review_id=review['id'], author=other.author,
+                                   text='Не согласен')
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert Review.objects.filter(pk=review['id']).exists(), (
+            'Проверьте, что чужие комментарии к отзывам пользователя '
+            'учитываются при выборе фоновой очистки.'
+        )
@@ -0,0 +1,116 @@
+from datetime import timedelta
+from http import HTTPStatus
+from smtplib import SMTPException
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from users.models import OutboxEmail
+from users.outbox import outbox_stats
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise SMTPException('Сервер недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28EmailOutbox:
+
+    def test_01_signup_enqueues_and_coalesces(self, client, settings,
+                                              django_user_model):
+        settings.EMAIL_BACKEND = 'tests.test_28_email_outbox.CountingBackend'
+        CountingBackend.opened = 0
+        data = {'username': 'outbox_user', 'email': 'outbox@yamdb.fake'}
+        for _ in range(3):
+            response = client.post(URL_SIGNUP, data=data)
+            assert response.status_code == HTTPStatus.OK
+        client.post(URL_SIGNUP, data={'username': 'other_user',
+                                      'email': 'other@yamdb.fake'})
+        assert len(mail.outbox) == 0, (
+            f'Проверьте, что `{URL_SIGNUP}` не отправляет письмо в запросе, '
+            'а ставит его в очередь.'
+        )
+        assert OutboxEmail.objects.filter(
+            email=data['email'], status=OutboxEmail.PENDING
+        ).count() == 1, (
+            'Проверьте, что повторная регистрация заменяет неотправленное '
+            'письмо с кодом подтверждения на тот же адрес.'
+        )
+
+        call_command('send_outbox')
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'other@yamdb.fake', data['email']
+        ]
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение.'
+        )
+        code = mail.outbox[0].body.split(': ')[-1]
+        if mail.outbox[0].to != [data['email']]:
+            code = mail.outbox[1].body.split(': ')[-1]
+        user = django_user_model.objects.get(username=data['username'])
+        assert user.check_confirmation_code(code), (
+            'Проверьте, что письмо из очереди содержит последний '
+            'выданный код подтверждения.'
+        )
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == 2
+        stats = outbox_stats()
+        assert stats['pending'] == 0
+        assert stats['sent'] == 2
+        assert stats['latency_max'] is not None
+
+    def test_02_retry_with_backoff(self, client, settings):
+        settings.EMAIL_BACKEND = 'tests.test_28_email_outbox.FailingBackend'
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        response = client.post(URL_SIGNUP, data={
+            'username': 'retry_user', 'email': 'retry@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{URL_SIGNUP}` не зависит от доступности '
+            'почтового сервера.'
+        )
+
+        call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.PENDING
+        assert email.attempts == 1
+        assert 'Сервер недоступен' in email.last_error
+        delay = email.next_attempt_at - timezone.now()
+        assert timedelta(seconds=30) < delay <= timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+        ), 'Проверьте, что повторная отправка откладывается.'
+        assert outbox_stats()['due'] == 0
+
+        call_command('send_outbox')
+        assert OutboxEmail.objects.get().attempts == 1
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.FAILED, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS попыток письмо '
+            'больше не отправляется.'
+        )
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        call_command('send_outbox')
+        assert len(mail.outbox) == 0
+        assert outbox_stats()['failed'] == 1
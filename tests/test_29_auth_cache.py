@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import UserStateCache, user_resource
+from api.cache import bump_generation
+
+
+def user_queries(client, url, method='get', data=None):
+    with CaptureQueriesContext(connection) as context:
+        response = getattr(client, method)(url, data=data)
+    return response, [query['sql'] for query in context.captured_queries
+                      if '"users_user"' in query['sql']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29AuthCache:
+
+    def test_01_warm_cache_skips_user_query(self, user_client, admin_client,
+                                            user):
+        url = '/api/v1/titles/'
+        response, queries = user_queries(user_client, url)
+        assert response.status_code == HTTPStatus.OK
+        assert len(queries) == 1
+        response, queries = user_queries(user_client, url)
+        assert response.status_code == HTTPStatus.OK
+        assert queries == [], (
+            f'Проверьте, что GET-запрос к `{url}` с прогретым кэшем '
+            'не читает пользователя из БД.'
+        )
+
+        response, _ = user_queries(user_client, '/api/v1/categories/',
+                                   'post', {'name': 'Кино', 'slug': 'kino'})
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        admin_client.patch(f'/api/v1/users/{user.username}/',
+                           data={'role': 'admin'})
+        response, _ = user_queries(
+            user_client, '/api/v1/categories/', 'post',
+            {'name': 'Кино', 'slug': 'kino'}
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что изменение роли пользователя сбрасывает '
+            'закэшированные данные аутентификации.'
+        )
+
+        response = user_client.get('/api/v1/users/me/')
+        assert response.json()['email'] == user.email
+
+    def test_02_shared_version_invalidates(self, user_client, user,
+                                           django_user_model):
+        url = '/api/v1/titles/'
+        assert user_client.get(url).status_code == HTTPStatus.OK
+        # Изменение в обход сигналов, как из другого воркера.
+        django_user_model.objects.filter(pk=user.pk).update(is_active=False)
+        assert user_client.get(url).status_code == HTTPStatus.OK
+        bump_generation(user_resource(user.pk))
+        assert user_client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что смена общего поколения пользователя сбрасывает '
+            'кэш аутентификации во всех воркерах.'
+        )
+
+    def test_03_lru_and_ttl(self):
+        cache = UserStateCache(maxsize=2, ttl=60)
+        cache.set(1, 'v', ('first',))
+        cache.set(2, 'v', ('second',))
+        assert cache.get(1, 'v') == ('first',)
+        cache.set(3, 'v', ('third',))
+        assert cache.get(2, 'v') is None, (
+            'Проверьте, что при переполнении вытесняется давно не '
+            'использованная запись.'
+        )
+        assert cache.get(1, 'v') == ('first',)
+        assert cache.get(1, 'other') is None
+
+        cache = UserStateCache(maxsize=2, ttl=-1)
+        cache.set(1, 'v', ('first',))
+        assert cache.get(1, 'v') is None
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import token_for_user, token_versions, user_cache
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {token_for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30TokenClaims:
+
+    def test_01_claims_authorize_without_queries(self, admin):
+        token = token_for_user(admin)
+        assert token['role'] == 'admin'
+        assert token['tv'] == admin.token_version
+        client = client_for(admin)
+        url = '/api/v1/categories/'
+        assert client.get(url).status_code == HTTPStatus.OK
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data={'name': 'Кино',
+                                              'slug': 'kino'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert not any('"users_user"' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что права администратора проверяются по токену '
+            'без запроса к таблице пользователей.'
+        )
+
+    def test_02_role_change_revokes_tokens(self, admin_client, user):
+        stale = client_for(user)
+        assert stale.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'bio': 'Новое био'})
+        assert response.status_code == HTTPStatus.OK
+        assert stale.get('/api/v1/users/me/').status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение профиля без смены роли не отзывает '
+            'токены.'
+        )
+
+        response = admin_client.patch(f'/api/v1/users/{user.username}/',
+                                      data={'role': 'moderator'})
+        assert response.status_code == HTTPStatus.OK
+        response = stale.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после смены роли токены с прежней ролью '
+            'отклоняются.'
+        )
+
+        user.refresh_from_db()
+        response = client_for(user).get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['role'] == 'moderator'
+
+    def test_03_role_change_outside_api(self, user):
+        client = client_for(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        user.role = 'admin'
+        user.save()
+        assert client.get(
+            '/api/v1/users/me/'
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен, роль в котором не совпадает с ролью '
+            'пользователя, отклоняется.'
+        )
+
+    def test_04_shared_version_and_deactivation(self, user):
+        client = client_for(user)
+        url = '/api/v1/titles/'
+        assert client.get(url).status_code == HTTPStatus.OK
+        # Память другого воркера пуста, общий кэш прогрет.
+        token_versions.clear()
+        user_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not any('"users_user"' in query['sql']
+                       for query in context.captured_queries), (
+            'Проверьте, что версия токенов берётся из общего кэша без '
+            'запроса к таблице пользователей.'
+        )
+
+        user.is_active = False
+        user.save()
+        assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что деактивация пользователя отзывает его токены.'
+        )
@@ -0,0 +1,92 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.filters import UserFilter
+from tests.utils import get_with_queries
+from users.views import ProfileManage
+
+URL = '/api/v1/users/'
+
+
+def create_users(django_user_model, count):
+    django_user_model.objects.bulk_create(
+        django_user_model(
+            username=f'bulk{idx:03}', email=f'Mail{idx:03}@yamdb.fake',
+            role='moderator' if idx % 10 == 0 else 'user'
+        ) for idx in range(count)
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31UserListing:
+
+    def test_01_page_size_and_cursor(self, admin_client, admin,
+                                     django_user_model):
+        create_users(django_user_model, 120)
+        data, _ = get_with_queries(admin_client, URL, {'page_size': 30})
+        assert data['count'] == 121
+        assert len(data['results']) == 30, (
+            f'Проверьте, что `{URL}` учитывает параметр `page_size`.'
+        )
+        data, _ = get_with_queries(admin_client, URL, {'page_size': 100000})
+        assert len(data['results']) == 121
+
+        usernames, url, params, queries = [], URL, {'cursor': '',
+                                                    'page_size': 25}, set()
+        while url:
+            data, sql = get_with_queries(admin_client, url, params)
+            usernames += [user['username'] for user in data['results']]
+            queries.add(len(sql))
+            url, params = data['next'], None
+        assert usernames == sorted(
+            django_user_model.objects.values_list('username', flat=True)
+        ), (
+            f'Проверьте, что `{URL}?cursor=` обходит всех пользователей '
+            'в порядке username.'
+        )
+        assert len(queries) == 1, (
+            'Проверьте, что число запросов к БД не зависит от страницы.'
+        )
+
+    def test_02_prefix_search_and_role(self, admin_client, admin,
+                                       django_user_model):
+        create_users(django_user_model, 120)
+        data, _ = get_with_queries(admin_client, URL, {'search': 'BULK01'})
+        assert [user['username'] for user in data['results']] == [
+            f'bulk{idx:03}' for idx in range(10, 20)
+        ], (
+            f'Проверьте, что `{URL}?search=` ищет по началу username без '
+            'учёта регистра.'
+        )
+        data, _ = get_with_queries(admin_client, URL, {'search': 'mail11'})
+        assert data['count'] == 10
+        data, _ = get_with_queries(admin_client, URL, {'role': 'moderator'})
+        assert data['count'] == 12
+        assert {user['role'] for user in data['results']} == {'moderator'}
+        response = admin_client.get(URL, {'role': 'owner'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+        django_user_model.objects.create(username='иван',
+                                         email='Ivan@yamdb.fake')
+        for search in ('ив', 'IVAN@'):
+            data, _ = get_with_queries(admin_client, URL, {'search': search})
+            assert [user['username'] for user in data['results']] == [
+                'иван'
+            ], (
+                f'Проверьте, что `{URL}?search={search}` находит '
+                'пользователя с username не латиницей.'
+            )
+
+    def test_03_search_uses_functional_indexes(self):
+        queryset = UserFilter({'search': 'bulk'},
+                              queryset=ProfileManage.queryset).qs
+        plan = queryset.explain()
+        assert ('user_username_upper_idx' in plan
+                and 'user_email_upper_idx' in plan), (
+            'Проверьте, что поиск по префиксу использует функциональные '
+            f'индексы. План запроса:\n{plan}'
+        )
+        plan = UserFilter({'role': 'admin'},
+                          queryset=ProfileManage.queryset).qs[:10].explain()
+        assert 'user_role_username_idx' in plan and 'TEMP B-TREE' not in plan
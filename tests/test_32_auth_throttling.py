@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import AuthIdentifierThrottle, SlidingWindowThrottle
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+class FakeView:
+    throttle_scope = 'signup'
+    throttle_identifier_fields = ('email',)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32AuthThrottling:
+
+    def test_01_signup_identifier_limit(self, client, monkeypatch):
+        monkeypatch.setattr(SlidingWindowThrottle, 'THROTTLE_RATES', {
+            'signup_ip': '100/hour', 'signup_identifier': '3/hour'
+        })
+        data = {'username': 'limited', 'email': 'limited@yamdb.fake'}
+        for _ in range(3):
+            assert client.post(URL_SIGNUP, data=data).status_code == (
+                HTTPStatus.OK
+            )
+        response = client.post(URL_SIGNUP, data={
+            'username': 'LIMITED', 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{URL_SIGNUP}` ограничивает число запросов '
+            'с одним username без учёта регистра.'
+        )
+        assert 0 < int(response['Retry-After']) <= 2 * 3600, (
+            'Проверьте, что ответ со статусом 429 содержит заголовок '
+            '`Retry-After`.'
+        )
+        response = client.post(URL_SIGNUP, data={
+            'username': 'another', 'email': 'another@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_token_ip_limit(self, client, monkeypatch):
+        monkeypatch.setattr(SlidingWindowThrottle, 'THROTTLE_RATES', {
+            'token_ip': '3/min', 'token_identifier': '100/min'
+        })
+        for idx in range(3):
+            response = client.post(URL_TOKEN, data={
+                'username': f'nobody{idx}', 'confirmation_code': '1'
+            })
+            assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.post(URL_TOKEN, data={'username': 'nobody9'},
+                               HTTP_X_FORWARDED_FOR='10.0.0.1')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что `{URL_TOKEN}` ограничивает число запросов '
+            'с одного IP и не доверяет заголовку X-Forwarded-For.'
+        )
+        response = client.post(URL_TOKEN, data={'username': 'nobody9'},
+                               REMOTE_ADDR='10.0.0.2')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_sliding_window(self, monkeypatch):
+        monkeypatch.setattr(SlidingWindowThrottle, 'THROTTLE_RATES', {
+            'signup_identifier': '10/min'
+        })
+        now = [600.0]
+        monkeypatch.setattr(SlidingWindowThrottle, 'timer',
+                            lambda self: now[0])
+        request = APIRequestFactory().post(URL_SIGNUP,
+                                           {'email': 'a@yamdb.fake'})
+        request.data = {'email': 'a@yamdb.fake'}
+        throttle = AuthIdentifierThrottle()
+
+        allowed = [throttle.allow_request(request, FakeView)
+                   for _ in range(11)]
+        assert allowed == [True] * 10 + [False]
+        # Окно кончится через 60 секунд, и ещё 6 секунд вес десяти
+        # запросов будет больше девяти.
+        assert throttle.wait() == 66
+
+        # Середина следующего окна: половина прошлых запросов
+        # ещё учитывается, свободно 5 мест.
+        now[0] = 690.0
+        allowed = [throttle.allow_request(request, FakeView)
+                   for _ in range(6)]
+        assert allowed == [True] * 5 + [False], (
+            'Проверьте, что запросы предыдущего окна учитываются '
+            'с весом, убывающим со временем.'
+        )
+        assert 1 <= throttle.wait() <= 30
+
+    def test_04_concurrent_requests_share_limit(self, monkeypatch):
+        monkeypatch.setattr(SlidingWindowThrottle, 'THROTTLE_RATES', {
+            'signup_ip': '1/min'
+        })
+        request = APIRequestFactory().post(URL_SIGNUP,
+                                           REMOTE_ADDR='10.0.0.3')
+        first, second = SlidingWindowThrottle(), SlidingWindowThrottle()
+        first.scope_suffix = second.scope_suffix = 'ip'
+        get_many = first.cache.get_many
+        results, started = [], []
+
+        def interleaved(keys):
+            # Второй запрос проверяется, когда первый уже прочитал
+            # счётчики, но ещё не решён.
+            counts = get_many(keys)
+            if not started:
+                started.append(True)
+                results.append(second.allow_request(request, FakeView))
+            return counts
+
+        monkeypatch.setattr(first.cache, 'get_many', interleaved)
+        results.insert(0, first.allow_request(request, FakeView))
+        assert results.count(True) == 1, (
+            'Проверьте, что параллельные запросы не превышают лимит.'
+        )
+        monkeypatch.setattr(first.cache, 'get_many', get_many)
+        assert not first.allow_request(request, FakeView)
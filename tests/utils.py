@@ -1,5 +1,11 @@
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review
+from users.models import User
+
 
 check_name_and_slug_patterns = (
     (
@@ -281,6 +287,52 @@ def create_comments(admin_client, authors_map):
     return result, reviews, titles
 
 
+def create_many_reviews(title_id, scores, prefix='reader', comment=False):
+    """Отзывы новых пользователей `<prefix><n>` в обход API.
+
+    `scores` — список оценок или число отзывов с оценками 1..10 по кругу.
+    С `comment=True` каждый автор ещё комментирует свой отзыв.
+    Возвращает отзывы в порядке создания.
+    """
+    if isinstance(scores, int):
+        scores = [idx % 10 + 1 for idx in range(scores)]
+    reviews = []
+    for idx, score in enumerate(scores):
+        author = User.objects.create_user(
+            username=f'{prefix}{idx}', email=f'{prefix}{idx}@yamdb.fake'
+        )
+        review = Review.objects.create(title_id=title_id, author=author,
+                                       text=f'{prefix} {idx}', score=score)
+        if comment:
+            Comment.objects.create(review=review, author=author,
+                                   text='Ответ')
+        reviews.append(review)
+    return reviews
+
+
+def get_with_queries(client, url, params=None):
+    """Данные ответа на GET-запрос и SQL всех запросов к БД."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, params)
+    assert response.status_code == HTTPStatus.OK
+    return response.json(), [query['sql']
+                             for query in context.captured_queries]
+
+
+def walk(client, url, direction='next', on_page=None):
+    """Идентификаторы объектов по страницам курсорной пагинации."""
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        pages.append([obj['id'] for obj in data['results']])
+        if on_page is not None:
+            on_page()
+        url = data[direction]
+    return pages
+
+
 def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
     obj_types = {
         'comment': 'комментария(ев) к отзыву',